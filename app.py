@@ -2,11 +2,17 @@ from flask import Flask, render_template, request, jsonify, redirect, url_for, f
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from bigcommerce_import_tool import ProductImporter
+from sync_daemon import SyncQueue
+from webhooks import WebhookPropagator
+from audit_log import new_batch_id
 import os
 import tempfile
 from dotenv import load_dotenv
 import requests
 import json
+import hashlib
+import hmac
+import time
 
 load_dotenv()
 
@@ -75,6 +81,24 @@ init_users()
 
 importer = ProductImporter()
 
+# Optional shared sync queue. `python sync_daemon.py` owns it and runs every job;
+# the app only queues interactive and webhook imports ahead of the daemon's bulk work.
+sync_queue = None
+if os.getenv('SYNC_SERVICE_ENABLED', '').lower() in ('1', 'true', 'yes'):
+    sync_queue = SyncQueue.from_env()
+
+webhook_propagator = WebhookPropagator.from_env(importer, sync_queue=sync_queue)
+
+def jsonify_with_etag(payload):
+    """JSON response carrying an ETag; answers 304 when the client already has this body."""
+    response = jsonify(payload)
+    etag = hashlib.sha1(response.get_data()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
@@ -123,12 +147,18 @@ def import_sku():
     if not source_store or not target_store:
         return jsonify({"success": False, "error": "Both source and target stores must be selected."}), 400
     
+    # Each request is its own audit batch, so it can be rolled back on its own
+    batch_id = new_batch_id()
     try:
-        success = importer.import_product_between_stores(source_store, target_store, sku, update_if_exists=update_if_exists)
+        # Without a live daemon nothing would drain the queue, so import directly
+        if sync_queue and sync_queue.daemon_running():
+            success = sync_queue.import_now(source_store, target_store, sku, update_if_exists=update_if_exists, batch_id=batch_id)
+        else:
+            success = importer.import_product_between_stores(source_store, target_store, sku, update_if_exists=update_if_exists, batch_id=batch_id)
         if success:
-            return jsonify({"success": True, "message": f"Successfully imported SKU: {sku} from {importer.get_store_display_name(source_store)} to {importer.get_store_display_name(target_store)}"})
+            return jsonify({"success": True, "batch_id": batch_id, "message": f"Successfully imported SKU: {sku} from {importer.get_store_display_name(source_store)} to {importer.get_store_display_name(target_store)}"})
         else:
-            return jsonify({"success": False, "error": f"Failed to import or update SKU: {sku}"})
+            return jsonify({"success": False, "batch_id": batch_id, "error": f"Failed to import or update SKU: {sku}"})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -152,14 +182,15 @@ def batch_import():
     else:
         return jsonify({"success": False, "error": "No SKUs provided."}), 400
 
-    results = []
-    for sku in skus:
-        try:
-            success = importer.import_product_between_stores(source_store, target_store, sku, update_if_exists=update_if_exists)
-            results.append({"sku": sku, "success": success})
-        except Exception as e:
-            results.append({"sku": sku, "success": False, "error": str(e)})
-    return jsonify({"success": True, "results": results})
+    batch_id = new_batch_id()
+    try:
+        outcomes = importer.import_products_between_stores(source_store, target_store, skus, update_if_exists=update_if_exists,
+                                                           batch_id=batch_id)
+    except ValueError as e:
+        # Store pair misconfigured (e.g. no FX rate); nothing was imported
+        return jsonify({"success": False, "error": str(e)})
+    results = [{"sku": sku, "success": outcomes.get(sku, False)} for sku in skus]
+    return jsonify({"success": True, "batch_id": batch_id, "results": results})
 
 @app.route("/stores", methods=["GET"])
 @login_required
@@ -170,6 +201,64 @@ def get_stores():
         "stores": importer.get_all_stores()
     })
 
+@app.route("/sync/status", methods=["GET"])
+@login_required
+def sync_status():
+    """Queue depth, lag and daemon counters of the shared sync queue"""
+    if not sync_queue:
+        return jsonify({"success": True, "enabled": False})
+    return jsonify({"success": True, "enabled": True, "status": sync_queue.status()})
+
+@app.route("/webhooks/bigcommerce", methods=["POST"])
+def bigcommerce_webhook():
+    """Receiver for BigCommerce store/product/updated webhooks"""
+    secret = os.getenv('WEBHOOK_SECRET')
+    provided = request.headers.get('X-Webhook-Secret', '')
+    if not secret or not hmac.compare_digest(provided, secret):
+        return jsonify({"success": False, "error": "Invalid webhook secret."}), 403
+    
+    payload = request.get_json(silent=True)
+    if not payload:
+        return jsonify({"success": False, "error": "Invalid webhook payload."}), 400
+    
+    # Always acknowledge quickly; BigCommerce retries and eventually disables slow hooks
+    queued = webhook_propagator.handle_event(payload)
+    return jsonify({"success": True, "queued": queued})
+
+@app.route("/metrics", methods=["GET"])
+@login_required
+def metrics_dashboard():
+    """Throughput, slowest SKUs and quota utilization from recorded metrics"""
+    try:
+        hours = max(1, min(24 * 30, int(request.args.get("hours", 24))))
+    except ValueError:
+        hours = 24
+    job_id = request.args.get("job") or None
+    since = time.time() - hours * 3600
+    # Wider buckets for longer windows keep the chart readable
+    bucket = 60 if hours <= 6 else 600 if hours <= 48 else 3600
+    
+    recorder = importer.metrics
+    throughput = recorder.import_throughput(since, job_id, bucket)
+    return render_template(
+        "metrics.html",
+        user=current_user,
+        hours=hours,
+        job_id=job_id,
+        bucket=bucket,
+        jobs=recorder.jobs(since),
+        throughput=throughput,
+        max_imports=max([row["imports"] for row in throughput] or [1]),
+        stores=recorder.store_summary(since, job_id),
+        store_throughput=recorder.store_throughput(since, job_id, bucket),
+        slowest=recorder.slowest_imports(since, job_id),
+        store_names=importer.get_all_stores()
+    )
+
+@app.template_filter("timestamp")
+def format_timestamp(value):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(value)) if value else ""
+
 @app.route("/compare", methods=["POST"])
 @login_required
 def compare():
@@ -198,7 +287,7 @@ def compare():
         
         # Check if destination product exists (this is optional for comparison)
         if not result["dest_product"]:
-            return jsonify({
+            return jsonify_with_etag({
                 "success": True,
                 "product_a": result["source_product"],
                 "product_b": None,
@@ -208,7 +297,7 @@ def compare():
             })
         
         # Both products exist
-        return jsonify({
+        return jsonify_with_etag({
             "success": True,
             "product_a": result["source_product"],
             "product_b": result["dest_product"],
@@ -219,6 +308,71 @@ def compare():
     except Exception as e:
         return jsonify({"success": False, "error": f"Error comparing products: {str(e)}"})
 
+def parse_sku_pairs(text):
+    """Parse "SKU_A[,SKU_B]" lines into (sku_a, sku_b) pairs; sku_b defaults to sku_a"""
+    pairs = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = [part.strip() for part in line.replace('\t', ',').split(',')]
+        pairs.append((parts[0], parts[1] if len(parts) > 1 and parts[1] else None))
+    return pairs
+
+@app.route("/compare_batch", methods=["POST"])
+@login_required
+def compare_batch():
+    store_a = request.form.get("store_a")
+    store_b = request.form.get("store_b")
+    pairs = parse_sku_pairs(request.form.get("sku_pairs"))
+    
+    if not store_a or not store_b:
+        return jsonify({"success": False, "error": "Both source and target stores must be selected."}), 400
+    if not pairs:
+        return jsonify({"success": False, "error": "No SKU pairs provided."}), 400
+    
+    try:
+        page = max(1, int(request.form.get("page", 1)))
+        per_page = min(100, max(1, int(request.form.get("per_page", 25))))
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid page parameters."}), 400
+    
+    try:
+        result = importer.compare_products_batch(store_a, store_b, pairs, page=page, per_page=per_page)
+        return jsonify_with_etag(dict(result, success=True))
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Error comparing products: {str(e)}"})
+
+@app.route("/update_target_batch", methods=["POST"])
+@login_required
+def update_target_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("items", []), list):
+        return jsonify({"success": False, "error": "Expected a JSON object with an items list."}), 400
+    if not all(isinstance(item, dict) for item in data.get("items", [])):
+        return jsonify({"success": False, "error": "Each item must be an object with sku_a, sku_b and fields."}), 400
+    store_a = data.get("store_a")
+    store_b = data.get("store_b")
+    items = [item for item in data.get("items", []) if item.get("sku_a") and item.get("fields")]
+    
+    if not store_a or not store_b:
+        return jsonify({"success": False, "error": "Both source and target stores must be selected."}), 400
+    if not items:
+        return jsonify({"success": False, "error": "No products selected for sync."}), 400
+    # Results are keyed by target SKU, so each may appear only once
+    target_skus = [item.get("sku_b") or item["sku_a"] for item in items]
+    duplicates = sorted({str(sku) for sku in target_skus if target_skus.count(sku) > 1})
+    if duplicates:
+        return jsonify({"success": False, "error": f"Target SKUs selected more than once: {', '.join(duplicates)}"}), 400
+    
+    batch_id = new_batch_id()
+    try:
+        outcomes = importer.update_target_products_batch(store_a, store_b, items, batch_id=batch_id)
+        results = [dict(outcome, sku=sku) for sku, outcome in outcomes.items()]
+        return jsonify({"success": True, "batch_id": batch_id, "results": results})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
 @app.route("/get_product", methods=["POST"])
 @login_required
 def get_product():
@@ -230,7 +384,7 @@ def get_product():
     try:
         product = importer.get_product_with_brand(store, sku)
         if product:
-            return jsonify({"success": True, "product": product})
+            return jsonify_with_etag({"success": True, "product": product})
         else:
             store_name = importer.get_store_display_name(store)
             return jsonify({
@@ -297,10 +451,11 @@ def update_target():
         print(f"=== DEBUG: Final update_data: {update_data} ===")
         
         # Use the importer to update the target product
-        success = importer.update_target_product(store_b, sku_b, update_data)
+        batch_id = new_batch_id()
+        success = importer.update_target_product(store_b, sku_b, update_data, batch_id=batch_id)
         
         if success:
-            return jsonify({"success": True, "message": f"Successfully updated product {sku_b} in target store"})
+            return jsonify({"success": True, "batch_id": batch_id, "message": f"Successfully updated product {sku_b} in target store"})
         else:
             return jsonify({"success": False, "error": f"Failed to update product {sku_b} in target store"})
             
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Write-ahead audit log for product updates
+
+Before the import tool overwrites a product, it appends the pre-image of every
+field it is about to change (taken from the product it already fetched) to a
+local append-only JSON-lines log. Entries are grouped by batch ID, one per
+import run or UI request, so a bad batch can be rolled back in one job: the pre-images are
+re-applied with BigCommerce's batch product update, ten products per request.
+
+Configuration (environment / .env):
+    AUDIT_LOG_PATH   log file location (default: import_tool_audit.jsonl next to this
+                     module; set it on hosts where that directory is read-only, such
+                     as Vercel, or audited updates will be refused)
+
+Usage:
+    python audit_log.py list
+    python audit_log.py rollback <batch_id> [--store wilson_us]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not locked across processes
+    fcntl = None
+
+# Kept with the app rather than in the temp dir, which is cleared on reboot
+DEFAULT_AUDIT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_tool_audit.jsonl")
+
+# Payload keys whose current value lives under a different product field
+PRE_IMAGE_FIELDS = {
+    "brand": "brand_id",
+    "brand_name": "brand_id"
+}
+
+# Fields recorded for reference but not re-applied; re-sending images adds copies
+ROLLBACK_SKIP_FIELDS = {"images"}
+
+# BigCommerce accepts at most 10 products per batch update
+ROLLBACK_BATCH_SIZE = 10
+
+
+def new_batch_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
+
+
+def values_equal(old: Any, new: Any) -> bool:
+    """Compare an existing value with a payload value (payloads send numbers as strings)"""
+    if old == new:
+        return True
+    try:
+        return float(old) == float(new)
+    except (TypeError, ValueError):
+        return False
+
+
+class AuditLog:
+    """Append-only JSON-lines log of product pre-images"""
+
+    def __init__(self, path: str = DEFAULT_AUDIT_LOG_PATH, batch_id: Optional[str] = None):
+        self.path = path
+        self.batch_id = batch_id or new_batch_id()
+
+    @classmethod
+    def from_env(cls) -> "AuditLog":
+        return cls(path=os.getenv("AUDIT_LOG_PATH", DEFAULT_AUDIT_LOG_PATH))
+
+    def record_update(self, store_name: str, product_id: int, sku: str,
+                      existing_product: Dict[str, Any], payload: Dict[str, Any],
+                      batch_id: Optional[str] = None) -> bool:
+        """Append the pre-image of the fields payload will change. Returns False if the write failed.
+
+        `batch_id` overrides the log's own batch ID, for callers that run several
+        batches through one long-lived importer (the Flask app, sync and webhooks).
+        """
+        before = {}
+        after = {}
+        for key, new_value in payload.items():
+            field = PRE_IMAGE_FIELDS.get(key, key)
+            if field not in existing_product:
+                continue
+            old_value = existing_product[field]
+            if field != key or not values_equal(old_value, new_value):
+                before[field] = old_value
+                after[key] = new_value
+        if not before:
+            return True
+
+        entry = {
+            "ts": time.time(),
+            "batch_id": batch_id or self.batch_id,
+            "store": store_name,
+            "product_id": product_id,
+            "sku": sku,
+            "before": before,
+            "after": after
+        }
+        try:
+            with open(self.path, "a") as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Error writing audit log {self.path}: {e}")
+            return False
+        return True
+
+    def read_entries(self, batch_id: Optional[str] = None, store_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield logged entries in write order, optionally filtered by batch and store"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted write
+                    continue
+                if batch_id and entry.get("batch_id") != batch_id:
+                    continue
+                if store_name and entry.get("store") != store_name:
+                    continue
+                yield entry
+
+    def summarize_batches(self) -> List[Dict[str, Any]]:
+        """One summary row per batch: first/last timestamp, stores and update count"""
+        batches = {}
+        for entry in self.read_entries():
+            batch = batches.setdefault(entry["batch_id"], {
+                "batch_id": entry["batch_id"], "first": entry["ts"], "last": entry["ts"],
+                "stores": set(), "updates": 0
+            })
+            batch["last"] = entry["ts"]
+            batch["stores"].add(entry["store"])
+            batch["updates"] += 1
+        return sorted(batches.values(), key=lambda batch: batch["first"])
+
+    def rollback(self, importer, batch_id: str, store_name: Optional[str] = None) -> Dict[str, int]:
+        """Re-apply the pre-images of a batch with batched writes. Returns counts per outcome.
+
+        A field is only restored while its current value still matches what the
+        batch wrote; fields changed again since then are reported as conflicts
+        and left alone.
+        """
+        # The earliest pre-image of each field is the value from before the batch,
+        # the latest post-image is the value the batch left behind
+        pre_images = {}
+        for entry in self.read_entries(batch_id, store_name):
+            key = (entry["store"], entry["product_id"])
+            pre_image = pre_images.setdefault(key, {"sku": entry["sku"], "fields": {}, "after": {}})
+            for field, value in entry["before"].items():
+                if field not in ROLLBACK_SKIP_FIELDS:
+                    pre_image["fields"].setdefault(field, value)
+            for payload_key, value in entry.get("after", {}).items():
+                pre_image["after"][PRE_IMAGE_FIELDS.get(payload_key, payload_key)] = (payload_key, value)
+
+        counts = {"products": 0, "restored": 0, "conflicts": 0, "failed": 0}
+        by_store = {}
+        for (store, product_id), pre_image in pre_images.items():
+            if pre_image["fields"]:
+                by_store.setdefault(store, []).append((product_id, pre_image))
+
+        for store, items in by_store.items():
+            api = importer.get_store_by_name(store)
+            if not api:
+                print(f"Unknown store '{store}' in audit log, skipping {len(items)} product(s)")
+                counts["failed"] += len(items)
+                continue
+            for start in range(0, len(items), ROLLBACK_BATCH_SIZE):
+                chunk = items[start:start + ROLLBACK_BATCH_SIZE]
+                counts["products"] += len(chunk)
+                fields = set().union(*(pre_image["fields"] for _, pre_image in chunk))
+                current = api.get_products_by_ids(
+                    [product_id for product_id, _ in chunk],
+                    include="custom_fields" if "custom_fields" in fields else None,
+                    include_fields=",".join(sorted(fields - {"custom_fields"} | {"sku"})))
+                if current is None:
+                    counts["failed"] += len(chunk)
+                    continue
+
+                updates = []
+                for product_id, pre_image in chunk:
+                    product = current.get(product_id)
+                    if product is None:
+                        print(f"Product {pre_image['sku']} (ID {product_id}) no longer exists in {store}")
+                        counts["failed"] += 1
+                        continue
+                    restore = {}
+                    conflicts = []
+                    for field, value in pre_image["fields"].items():
+                        if field not in pre_image["after"] or _still_written(api, product, field, *pre_image["after"][field]):
+                            restore[field] = value
+                        else:
+                            conflicts.append(field)
+                    if conflicts:
+                        print(f"Not restoring {', '.join(conflicts)} on {pre_image['sku']} in {store}: "
+                              f"changed since batch {batch_id}")
+                        counts["conflicts"] += 1
+                    if restore:
+                        updates.append((pre_image["sku"], dict(restore, id=product_id)))
+
+                if updates:
+                    result = api.update_products([update for _, update in updates])
+                    counts["restored" if result else "failed"] += len(updates)
+                    importer.invalidate_cached_product(store, *[sku for sku, _ in updates])
+        return counts
+
+
+def _still_written(api, product: Dict[str, Any], field: str, payload_key: str, written: Any) -> bool:
+    """Whether a product's current value of `field` is still the value the batch wrote"""
+    if field not in product and field != "custom_fields":
+        return False
+    current = product.get(field)
+    if field == "custom_fields":
+        current_pairs = {(custom_field.get("name"), custom_field.get("value")) for custom_field in current or []}
+        return all((custom_field.get("name"), custom_field.get("value")) in current_pairs
+                   for custom_field in written or [])
+    if field != payload_key:
+        # The batch wrote a brand name; the product only carries the brand ID
+        return api.get_brand_name(current).strip().lower() == str(written or "").strip().lower()
+    return values_equal(current, written)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("list", "rollback"):
+        print("Usage:")
+        print("  python audit_log.py list")
+        print("  python audit_log.py rollback <batch_id> [--store STORE]")
+        sys.exit(1)
+
+    audit_log = AuditLog.from_env()
+    if sys.argv[1] == "list":
+        batches = audit_log.summarize_batches()
+        if not batches:
+            print(f"No audited updates in {audit_log.path}")
+        for batch in batches:
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(batch["first"]))
+            print(f"{batch['batch_id']}  {started}  {batch['updates']} update(s)  "
+                  f"stores: {', '.join(sorted(batch['stores']))}")
+        return
+
+    if len(sys.argv) < 3:
+        print("Please specify the batch ID to roll back")
+        sys.exit(1)
+    batch_id = sys.argv[2]
+    store_name = None
+    if "--store" in sys.argv:
+        index = sys.argv.index("--store")
+        if index + 1 >= len(sys.argv):
+            print("Please specify a store after --store")
+            sys.exit(1)
+        store_name = sys.argv[index + 1]
+
+    # Imported here so listing works without store credentials configured
+    from bigcommerce_import_tool import ProductImporter
+
+    print(f"⏪ Rolling back batch {batch_id}{f' in {store_name}' if store_name else ''}...")
+    counts = audit_log.rollback(ProductImporter(), batch_id, store_name)
+    print(f"Products: {counts['products']}  Restored: {counts['restored']}  "
+          f"Conflicts: {counts['conflicts']}  Failed: {counts['failed']}")
+    sys.exit(0 if counts["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,24 @@ Usage:
     python batch_import.py SKU1 SKU2 SKU3
     python batch_import.py --file skus.txt
     python batch_import.py --file skus.txt --quiet
+    python batch_import.py --file skus.txt --quiet --workers 4 --rate 3
 """
 
 import sys
 import time
-from bigcommerce_import_tool import ProductImporter
+import multiprocessing
+from bigcommerce_import_tool import STORE_NAMES, ProductImporter
+from rate_budget import StoreRateBudget
+from audit_log import AuditLog, new_batch_id
+
+# Options that take a value; their values must not be mistaken for SKUs
+VALUE_OPTIONS = ("--file", "--workers", "--rate")
+
+# Default per-store request rate shared by all worker processes
+DEFAULT_REQUESTS_PER_SECOND = 3.0
+
+# Per-process importer, created by init_worker
+worker_importer = None
 
 def read_skus_from_file(filename: str) -> list:
     """Read SKUs from a text file (one SKU per line)"""
@@ -28,18 +41,96 @@ def read_skus_from_file(filename: str) -> list:
         print(f"Error reading file {filename}: {e}")
         return []
 
+def get_option_value(name: str, default=None):
+    """Return the value following a command line option, or default"""
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name)
+    if index + 1 >= len(sys.argv):
+        print(f"Please specify a value after {name}")
+        sys.exit(1)
+    return sys.argv[index + 1]
+
+def init_worker(budget: StoreRateBudget, batch_id: str):
+    """Create this process's ProductImporter and attach the shared rate budget"""
+    global worker_importer
+    worker_importer = ProductImporter()
+    worker_importer.set_batch_id(batch_id)
+    for store_name, store in worker_importer.stores.items():
+        store.rate_limiter = budget.limiter_for(store_name)
+
+def import_shard(args) -> list:
+    """Import one shard of SKUs in a worker process, returning (sku, success) pairs"""
+    skus, show_details = args
+    results = []
+    for sku in skus:
+        try:
+            success = worker_importer.import_product_by_sku(sku, show_details)
+        except Exception as e:
+            print(f"Unexpected error importing {sku}: {e}")
+            success = False
+        results.append((sku, success))
+    # Pool workers are terminated without running atexit handlers
+    worker_importer.metrics.flush()
+    return results
+
+def run_sequential(skus: list, show_details: bool, batch_id: str) -> dict:
+    """Import SKUs one at a time in this process"""
+    # Initialize importer
+    importer = ProductImporter()
+    importer.set_batch_id(batch_id)
+    results = {}
+    
+    # Import each product
+    for i, sku in enumerate(skus, 1):
+        print(f"\n{'='*50}")
+        print(f"Processing {i}/{len(skus)}: {sku}")
+        print(f"{'='*50}")
+        
+        try:
+            results[sku] = importer.import_product_by_sku(sku, show_details)
+        except Exception as e:
+            print(f"Unexpected error importing {sku}: {e}")
+            results[sku] = False
+        
+        # Add a small delay between imports to be respectful to the API
+        if i < len(skus):  # Don't sleep after the last item
+            time.sleep(1)
+    return results
+
+def run_parallel(skus: list, show_details: bool, batch_id: str, workers: int, requests_per_second: float) -> dict:
+    """Shard SKUs round-robin across worker processes sharing one rate budget per store"""
+    budget = StoreRateBudget(STORE_NAMES, requests_per_second)
+    shards = [(skus[i::workers], show_details) for i in range(workers)]
+    results = {}
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(budget, batch_id)) as pool:
+        for shard_results in pool.imap_unordered(import_shard, shards):
+            results.update(shard_results)
+    return results
+
 def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python batch_import.py SKU1 SKU2 SKU3 ...")
         print("  python batch_import.py --file skus.txt")
         print("  python batch_import.py --file skus.txt --quiet")
+        print("  python batch_import.py --file skus.txt --workers 4 [--rate REQUESTS_PER_SECOND]")
         sys.exit(1)
     
     # Parse arguments
     show_details = "--quiet" not in sys.argv
     skus = []
     
+    try:
+        workers = int(get_option_value("--workers", 1))
+        requests_per_second = float(get_option_value("--rate", DEFAULT_REQUESTS_PER_SECOND))
+    except ValueError:
+        print("--workers must be an integer and --rate a number")
+        sys.exit(1)
+    if workers < 1 or requests_per_second <= 0:
+        print("--workers and --rate must be positive")
+        sys.exit(1)
+    
     if "--file" in sys.argv:
         file_index = sys.argv.index("--file")
         if file_index + 1 < len(sys.argv):
@@ -49,8 +140,10 @@ def main():
             print("Please specify a filename after --file")
             sys.exit(1)
     else:
-        # Get SKUs from command line (excluding flags)
-        skus = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+        # Get SKUs from command line (excluding flags and their values)
+        option_values = {i + 1 for i, arg in enumerate(sys.argv) if arg in VALUE_OPTIONS}
+        skus = [arg for i, arg in enumerate(sys.argv[1:], 1)
+                if not arg.startswith("--") and i not in option_values]
     
     if not skus:
         print("No SKUs provided")
@@ -59,32 +152,25 @@ def main():
     print(f"🚀 Starting batch import of {len(skus)} products...")
     print(f"📋 SKUs to import: {', '.join(skus)}")
     
-    # Initialize importer
-    importer = ProductImporter()
+    # Every update in this run is audited under one batch ID so it can be rolled back together
+    batch_id = new_batch_id()
     
     # Track results
     successful_imports = []
     failed_imports = []
     
-    # Import each product
-    for i, sku in enumerate(skus, 1):
-        print(f"\n{'='*50}")
-        print(f"Processing {i}/{len(skus)}: {sku}")
-        print(f"{'='*50}")
-        
-        try:
-            success = importer.import_product_by_sku(sku, show_details)
-            if success:
-                successful_imports.append(sku)
-            else:
-                failed_imports.append(sku)
-        except Exception as e:
-            print(f"Unexpected error importing {sku}: {e}")
+    if workers > 1:
+        print(f"⚙️  Using {workers} worker processes at {requests_per_second:g} requests/second per store")
+        results = run_parallel(skus, show_details, batch_id, workers, requests_per_second)
+    else:
+        results = run_sequential(skus, show_details, batch_id)
+    
+    # Merge results back in the original SKU order
+    for sku in skus:
+        if results.get(sku):
+            successful_imports.append(sku)
+        else:
             failed_imports.append(sku)
-        
-        # Add a small delay between imports to be respectful to the API
-        if i < len(skus):  # Don't sleep after the last item
-            time.sleep(1)
     
     # Print final summary
     print(f"\n{'='*60}")
@@ -104,6 +190,10 @@ def main():
         for sku in failed_imports:
             print(f"   - {sku}")
     
+    if any(AuditLog.from_env().read_entries(batch_id)):
+        print(f"\nAudit batch: {batch_id}")
+        print(f"   Roll back updates with: python audit_log.py rollback {batch_id}")
+    
     # Exit with appropriate code
     sys.exit(0 if len(failed_imports) == 0 else 1)
 
@@ -14,9 +14,67 @@ Features:
 import os
 import sys
 import json
+import time
 import requests
-from typing import Dict, Optional, Any
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from dotenv import load_dotenv
+from product_cache import ProductCache, CACHE_MISS
+from price_transforms import build_price_pipeline
+from product_record import ProductRecord, text_digest
+from audit_log import AuditLog, values_equal
+from metrics import MetricsRecorder, tags_job
+from cassette import Cassette
+
+# Sub-resources requested by default when fetching a product (full view used by the UI)
+PRODUCT_INCLUDE_ALL = "variants,custom_fields,bulk_pricing_rules,primary_image,images"
+
+# Projection used when copying a product to another store: only what
+# extract_product_fields reads, so large image lists and variants are skipped
+PRODUCT_IMPORT_INCLUDE = "custom_fields,bulk_pricing_rules"
+PRODUCT_IMPORT_FIELDS = "name,description,sku,upc,mpn,gtin,custom_url,type,weight,price,categories,availability,is_visible"
+
+# Projection for existence checks; BigCommerce always returns the ID
+PRODUCT_LOOKUP_FIELDS = "id,name"
+PRODUCT_ID_FIELDS = "id"
+
+# Projection for products about to be updated: every field an update may write,
+# so the audit log can record their pre-images. Only update_target_product writes
+# images, so only it fetches the target's image list.
+PRODUCT_AUDIT_INCLUDE = "custom_fields"
+PRODUCT_AUDIT_FIELDS = PRODUCT_IMPORT_FIELDS + ",brand_id,width,height,depth"
+PRODUCT_TARGET_UPDATE_INCLUDE = "custom_fields,images"
+
+# Comparison UI field names -> BigCommerce API fields for target updates
+TARGET_FIELD_MAPPING = {
+    'name': 'name',
+    'price': 'price',
+    'brand': 'brand_name',  # BigCommerce uses brand_name for brand
+    'description': 'description',
+    'sku': 'sku',
+    'mpn': 'mpn',
+    'upc': 'upc',
+    'gtin': 'gtin',
+    'weight': 'weight',
+    'width': 'width',
+    'height': 'height',
+    'depth': 'depth',
+    'custom_fields': 'custom_fields',
+    'images': 'images'
+}
+
+# Fields compared (and syncable) in the multi-SKU comparison
+BATCH_COMPARE_FIELDS = ['name', 'price', 'brand', 'description', 'sku', 'mpn', 'upc', 'gtin',
+                        'weight', 'width', 'height', 'depth']
+PRODUCT_COMPARE_FIELDS = "name,price,brand_id,description,sku,mpn,upc,gtin,weight,width,height,depth"
+
+# Configured stores, in display order
+STORE_NAMES = ('wilson_us', 'signal_us', 'wilson_ca', 'signal_ca')
+
+# BigCommerce limits: SKUs per sku:in filter and products per batch update
+SKU_LOOKUP_BATCH_SIZE = 50
+PRODUCT_UPDATE_BATCH_SIZE = 10
 
 class BigCommerceAPI:
     """BigCommerce API client wrapper"""
@@ -32,15 +90,49 @@ class BigCommerceAPI:
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
+        # Optional shared request budget (see rate_budget.py); anything with a wait() method
+        self.rate_limiter = None
+        # Optional per-store traffic recorder (see metrics.py)
+        self.metrics = None
+        # Optional record/replay cassette (see cassette.py)
+        self.cassette = None
     
-    def get_product_by_sku(self, sku: str) -> Optional[Dict[str, Any]]:
-        """Get product details by SKU from BigCommerce store"""
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request to the store API, waiting for the rate budget first"""
+        replaying = self.cassette is not None and self.cassette.replaying
+        if self.rate_limiter is not None and not replaying:
+            self.rate_limiter.wait()
+        started = time.time()
+        response = None
+        try:
+            if replaying:
+                response = self.cassette.replay(method, url, **kwargs)
+            else:
+                response = requests.request(method, url, headers=self.headers, **kwargs)
+                if self.cassette is not None:
+                    self.cassette.record(method, url, response, time.time() - started, **kwargs)
+            return response
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_response(method, response, time.time() - started)
+    
+    def get_product_by_sku(self, sku: str, include: Optional[str] = PRODUCT_INCLUDE_ALL,
+                           include_fields: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get product details by SKU from BigCommerce store
+
+        `include` selects sub-resources and `include_fields` limits the product body
+        to the listed fields, so callers can ask for only what they use.
+        """
         try:
             # Search for product by SKU
             url = f"{self.base_url}/catalog/products"
-            params = {"sku": sku, "include": "variants,custom_fields,bulk_pricing_rules,primary_image,images"}
+            params = {"sku": sku}
+            if include:
+                params["include"] = include
+            if include_fields:
+                params["include_fields"] = include_fields
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self._request("GET", url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -54,12 +146,102 @@ class BigCommerceAPI:
             print(f"Error fetching product with SKU {sku}: {e}")
             return None
     
+    def get_products_by_skus(self, skus: List[str], include: Optional[str] = None,
+                             include_fields: Optional[str] = None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """Look up many SKUs with sku:in filters.
+
+        Returns ({sku: product} for the ones found, {sku: error} for the ones whose
+        lookup request failed), so callers can tell "missing" from "lookup failed".
+        """
+        url = f"{self.base_url}/catalog/products"
+        products = {}
+        failed = {}
+        unique_skus = list(dict.fromkeys(sku for sku in skus if sku))
+        for start in range(0, len(unique_skus), SKU_LOOKUP_BATCH_SIZE):
+            chunk = unique_skus[start:start + SKU_LOOKUP_BATCH_SIZE]
+            params = {"sku:in": ",".join(chunk), "limit": len(chunk)}
+            if include:
+                params["include"] = include
+            if include_fields:
+                params["include_fields"] = include_fields
+            try:
+                response = self._request("GET", url, params=params)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching products for SKUs {chunk}: {e}")
+                failed.update((sku, str(e)) for sku in chunk)
+                continue
+            for product in response.json().get("data", []):
+                products[product.get("sku")] = product
+        return products, failed
+    
+    def get_products_by_ids(self, product_ids: List[int], include: Optional[str] = None,
+                            include_fields: Optional[str] = None) -> Optional[Dict[int, Dict[str, Any]]]:
+        """Look up up to 50 products with an id:in filter; returns {id: product}, or None if the request failed"""
+        try:
+            url = f"{self.base_url}/catalog/products"
+            params = {"id:in": ",".join(str(product_id) for product_id in product_ids), "limit": len(product_ids)}
+            if include:
+                params["include"] = include
+            if include_fields:
+                params["include_fields"] = include_fields
+            
+            response = self._request("GET", url, params=params)
+            response.raise_for_status()
+            return {product["id"]: product for product in response.json().get("data", [])}
+            
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching products with IDs {product_ids}: {e}")
+            return None
+    
+    def get_product_by_id(self, product_id: int, include: Optional[str] = None,
+                          include_fields: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get product details by product ID from BigCommerce store"""
+        try:
+            url = f"{self.base_url}/catalog/products/{product_id}"
+            params = {}
+            if include:
+                params["include"] = include
+            if include_fields:
+                params["include_fields"] = include_fields
+            
+            response = self._request("GET", url, params=params)
+            response.raise_for_status()
+            return response.json().get("data")
+            
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching product with ID {product_id}: {e}")
+            return None
+    
+    def iter_products(self, include: Optional[str] = None, include_fields: Optional[str] = None,
+                      page_size: int = 250, **filters) -> Iterator[Dict[str, Any]]:
+        """Yield every product in the catalog matching the filters, one page at a time
+
+        A failed page raises requests.exceptions.RequestException rather than ending
+        the listing early, so callers never mistake a partial listing for a full one.
+        """
+        url = f"{self.base_url}/catalog/products"
+        params = dict(filters, limit=page_size, page=1)
+        if include:
+            params["include"] = include
+        if include_fields:
+            params["include_fields"] = include_fields
+        while True:
+            response = self._request("GET", url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            yield from data.get("data", [])
+            pagination = data.get("meta", {}).get("pagination", {})
+            if params["page"] >= pagination.get("total_pages", 0):
+                return
+            params["page"] += 1
+    
     def create_product(self, product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new product in BigCommerce store"""
         try:
             url = f"{self.base_url}/catalog/products"
             
-            response = requests.post(url, headers=self.headers, json=product_data)
+            response = self._request("POST", url, json=product_data)
             response.raise_for_status()
             
             return response.json()
@@ -80,7 +262,7 @@ class BigCommerceAPI:
             print(f"  Request data: {product_data}")
             print(f"  Headers: {self.headers}")
             
-            response = requests.put(url, headers=self.headers, json=product_data)
+            response = self._request("PUT", url, json=product_data)
             
             print(f"=== DEBUG: HTTP Response ===")
             print(f"  Status Code: {response.status_code}")
@@ -96,13 +278,29 @@ class BigCommerceAPI:
                 print(f"=== DEBUG: Error response status: {e.response.status_code} ===")
             return None
     
+    def update_products(self, products: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Update up to 10 products in one request; each item must carry its product `id`"""
+        try:
+            url = f"{self.base_url}/catalog/products"
+            
+            response = self._request("PUT", url, json=products)
+            response.raise_for_status()
+            
+            return response.json()
+            
+        except requests.exceptions.RequestException as e:
+            print(f"Error batch updating products: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"Response content: {e.response.text}")
+            return None
+    
     def get_brand_name(self, brand_id: int) -> str:
         """Fetch the brand name by brand_id from BigCommerce store."""
         if not brand_id:
             return ''
         try:
             url = f"{self.base_url}/catalog/brands/{brand_id}"
-            response = requests.get(url, headers=self.headers)
+            response = self._request("GET", url)
             response.raise_for_status()
             data = response.json()
             return data.get('data', {}).get('name', '')
@@ -116,51 +314,81 @@ class ProductImporter:
     def __init__(self):
         load_dotenv()
         
-        # Initialize all stores
+        # Initialize all stores; credentials come from <STORE>_HASH, <STORE>_ACCESS_TOKEN and <STORE>_CLIENT_ID
         self.stores = {
-            'wilson_us': BigCommerceAPI(
-                store_hash=os.getenv("WILSON_US_HASH"),
-                access_token=os.getenv("WILSON_US_ACCESS_TOKEN"),
-                client_id=os.getenv("WILSON_US_CLIENT_ID")
-            ),
-            'signal_us': BigCommerceAPI(
-                store_hash=os.getenv("SIGNAL_US_HASH"),
-                access_token=os.getenv("SIGNAL_US_ACCESS_TOKEN"),
-                client_id=os.getenv("SIGNAL_US_CLIENT_ID")
-            ),
-            'wilson_ca': BigCommerceAPI(
-                store_hash=os.getenv("WILSON_CA_HASH"),
-                access_token=os.getenv("WILSON_CA_ACCESS_TOKEN"),
-                client_id=os.getenv("WILSON_CA_CLIENT_ID")
-            ),
-            'signal_ca': BigCommerceAPI(
-                store_hash=os.getenv("SIGNAL_CA_HASH"),
-                access_token=os.getenv("SIGNAL_CA_ACCESS_TOKEN"),
-                client_id=os.getenv("SIGNAL_CA_CLIENT_ID")
+            store_name: BigCommerceAPI(
+                store_hash=os.getenv(f"{store_name.upper()}_HASH"),
+                access_token=os.getenv(f"{store_name.upper()}_ACCESS_TOKEN"),
+                client_id=os.getenv(f"{store_name.upper()}_CLIENT_ID")
             )
+            for store_name in STORE_NAMES
         }
         
         # Set default source and destination (for backward compatibility)
         self.source_store = self.stores['wilson_us']
         self.dest_store = self.stores['signal_us']
+        
+        # Short-lived (store, sku) cache shared by the Flask workers
+        self.product_cache = ProductCache.from_env()
+        
+        # Pre-images of every update, so a batch can be rolled back (see audit_log.py)
+        self.audit_log = AuditLog.from_env()
+        
+        # Request and import timings for the /metrics dashboard
+        self.metrics = MetricsRecorder.from_env()
+        for store_name, store in self.stores.items():
+            store.metrics = self.metrics.for_store(store_name)
+        
+        # Record or replay API traffic when BIGCOMMERCE_CASSETTE is set
+        self.cassette = Cassette.from_env()
+        if self.cassette:
+            for store_name, store in self.stores.items():
+                store.cassette = self.cassette.for_store(store_name)
+    
+    def set_batch_id(self, batch_id: str):
+        """Group this run's audit entries and metrics under one ID"""
+        self.audit_log.batch_id = batch_id
+        self.metrics.job_id = batch_id
     
     def get_store_by_name(self, store_name):
         """Get store API by name"""
         return self.stores.get(store_name)
     
+    def get_store_name(self, store):
+        """Get the configured name of a store API object"""
+        for name, candidate in self.stores.items():
+            if candidate is store:
+                return name
+        return None
+    
     def get_product_with_brand(self, store_name: str, sku: str) -> dict:
         """Fetch product by SKU and include brand name if available."""
         store = self.get_store_by_name(store_name)
         if not store:
             return None
+        
+        cached = self.product_cache.get(store_name, sku)
+        if cached is not CACHE_MISS:
+            return cached
             
-        product = store.get_product_by_sku(sku)
+        # Bulk lookup so a failed request isn't cached as "not found"
+        products, failed = store.get_products_by_skus([sku], include=PRODUCT_INCLUDE_ALL)
+        if sku in failed:
+            return None
+        product = products.get(sku)
+        if product is None:
+            print(f"No product found with SKU: {sku}")
         if product and product.get('brand_id'):
             product['brand'] = store.get_brand_name(product['brand_id'])
-        else:
+        elif product:
             product['brand'] = ''
+        self.product_cache.set(store_name, sku, product)
         return product
     
+    def invalidate_cached_product(self, store_name: str, *skus: str):
+        """Drop cached lookups for SKUs that were just written to a store"""
+        self.product_cache.invalidate(store_name, *skus)
+    
     def compare_products(self, source_store: str, dest_store: str, sku_a: str, sku_b: str = None):
         """Compare products between two stores"""
         source_product = self.get_product_with_brand(source_store, sku_a)
@@ -176,6 +404,186 @@ class ProductImporter:
             'dest_store_name': self.get_store_display_name(dest_store)
         }
     
+    def resolve_brand_names(self, lookups: List[Tuple[str, int]]) -> Dict[Tuple[str, int], str]:
+        """Resolve (store name, brand ID) pairs to brand names concurrently"""
+        unique = list(dict.fromkeys((store_name, brand_id) for store_name, brand_id in lookups if brand_id))
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(8, len(unique))) as executor:
+            # Pool threads don't inherit context; carry the caller's job ID into each lookup
+            futures = [executor.submit(contextvars.copy_context().run,
+                                       self.get_store_by_name(store_name).get_brand_name, brand_id)
+                       for store_name, brand_id in unique]
+            return dict(zip(unique, (future.result() for future in futures)))
+    
+    def compare_products_batch(self, source_store: str, dest_store: str, pairs: List[Tuple[str, Optional[str]]],
+                               page: int = 1, per_page: int = 25) -> Dict[str, Any]:
+        """Compare a page of (source SKU, target SKU) pairs using bulk lookups on both stores.
+
+        Source prices are run through the pair's price pipeline first, so stores in
+        different currencies are compared on the price a sync would write.
+        """
+        source = self.get_store_by_name(source_store)
+        dest = self.get_store_by_name(dest_store)
+        if not source or not dest:
+            raise ValueError(f"Invalid store names: {source_store}, {dest_store}")
+        
+        warning = None
+        try:
+            price_pipeline = build_price_pipeline(source_store, dest_store)
+        except ValueError as e:
+            # Raw prices in different currencies would all show as drifted
+            warning = f"Prices not compared: {e}"
+            price_pipeline = None
+        
+        total = len(pairs)
+        page_pairs = [(sku_a, sku_b or sku_a) for sku_a, sku_b in pairs[(page - 1) * per_page:page * per_page]]
+        source_products, source_failed = source.get_products_by_skus(
+            [sku_a for sku_a, _ in page_pairs], include_fields=PRODUCT_COMPARE_FIELDS)
+        dest_products, dest_failed = dest.get_products_by_skus(
+            [sku_b for _, sku_b in page_pairs], include_fields=PRODUCT_COMPARE_FIELDS)
+        
+        brand_names = self.resolve_brand_names(
+            [(source_store, p.get('brand_id')) for p in source_products.values()] +
+            [(dest_store, p.get('brand_id')) for p in dest_products.values()])
+        for store_name, products in ((source_store, source_products), (dest_store, dest_products)):
+            for product in products.values():
+                product['brand'] = brand_names.get((store_name, product.get('brand_id')), '')
+        
+        results = []
+        for sku_a, sku_b in page_pairs:
+            product_a = source_products.get(sku_a)
+            product_b = dest_products.get(sku_b)
+            diffs = {}
+            if product_a and product_b:
+                for field in BATCH_COMPARE_FIELDS:
+                    value_a, value_b = product_a.get(field), product_b.get(field)
+                    if field == 'price':
+                        if warning:
+                            continue
+                        if price_pipeline and value_a not in (None, ''):
+                            converted = price_pipeline.apply([{'price': str(value_a)}])[0]['price']
+                            if not values_equal(converted, value_b):
+                                diffs[field] = {'a': converted, 'b': value_b, 'a_original': value_a}
+                            continue
+                    if field == 'description':
+                        # Descriptions are compared by digest and not sent back in full
+                        if text_digest(value_a) != text_digest(value_b):
+                            diffs[field] = {'a': '(differs)', 'b': '(differs)'}
+                    elif not values_equal(value_a, value_b):
+                        diffs[field] = {'a': value_a, 'b': value_b}
+            results.append({
+                'sku_a': sku_a,
+                'sku_b': sku_b,
+                'found_a': product_a is not None,
+                'found_b': product_b is not None,
+                'lookup_error_a': source_failed.get(sku_a),
+                'lookup_error_b': dest_failed.get(sku_b),
+                'name_a': product_a.get('name') if product_a else None,
+                'name_b': product_b.get('name') if product_b else None,
+                'diffs': diffs
+            })
+        
+        return {
+            'results': results,
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'total_pages': (total + per_page - 1) // per_page,
+            'store_a_name': self.get_store_display_name(source_store),
+            'store_b_name': self.get_store_display_name(dest_store),
+            'warning': warning
+        }
+    
+    @tags_job
+    def update_target_products_batch(self, source_store: str, dest_store: str,
+                                     items: List[Dict[str, Any]], batch_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Copy selected fields from source to target for many SKU pairs with batched writes.
+
+        Each item is {"sku_a", "sku_b", "fields"}; returns {"success", "error"} per
+        target SKU, so a target SKU may appear only once (ValueError otherwise). Prices go through the pair's price pipeline, so a price sync
+        across currencies is refused when no FX rate is configured. Pre-images are
+        audited under `batch_id` (default: the audit log's own).
+        """
+        source = self.get_store_by_name(source_store)
+        dest = self.get_store_by_name(dest_store)
+        if not source or not dest:
+            raise ValueError(f"Invalid store names: {source_store}, {dest_store}")
+        
+        items = [dict(item, sku_b=item.get('sku_b') or item['sku_a']) for item in items]
+        target_skus = [item['sku_b'] for item in items]
+        if len(set(target_skus)) != len(target_skus):
+            raise ValueError("Each target SKU may only be updated once per batch")
+        price_pipeline = None
+        if any('price' in item.get('fields', []) for item in items):
+            price_pipeline = build_price_pipeline(source_store, dest_store)
+        source_products, source_failed = source.get_products_by_skus(
+            [item['sku_a'] for item in items], include_fields=PRODUCT_COMPARE_FIELDS)
+        dest_products, dest_failed = dest.get_products_by_skus(
+            [item['sku_b'] for item in items], include_fields=PRODUCT_AUDIT_FIELDS)
+        brand_names = self.resolve_brand_names(
+            [(source_store, p.get('brand_id')) for p in source_products.values()])
+        
+        results = {}
+        prepared = []
+        for item in items:
+            sku_a, sku_b = item['sku_a'], item['sku_b']
+            source_product = source_products.get(sku_a)
+            existing_product = dest_products.get(sku_b)
+            error = None
+            if sku_a in source_failed:
+                error = f"Lookup of {sku_a} in {self.get_store_display_name(source_store)} failed: {source_failed[sku_a]}"
+            elif sku_b in dest_failed:
+                error = f"Lookup of {sku_b} in {self.get_store_display_name(dest_store)} failed: {dest_failed[sku_b]}"
+            elif not source_product:
+                error = f"{sku_a} not found in {self.get_store_display_name(source_store)}"
+            elif not existing_product:
+                error = f"{sku_b} not found in {self.get_store_display_name(dest_store)}"
+            if error:
+                print(f"Skipping {sku_a} -> {sku_b}: {error}")
+                results[sku_b] = {"success": False, "error": error}
+                continue
+            source_product['brand'] = brand_names.get((source_store, source_product.get('brand_id')), '')
+            
+            payload = {}
+            for field in item.get('fields', []):
+                if field not in BATCH_COMPARE_FIELDS or source_product.get(field) in (None, ''):
+                    continue
+                value = source_product[field]
+                if field == 'price':
+                    value = str(value)
+                elif field in ('weight', 'width', 'height', 'depth'):
+                    value = float(value)
+                payload[TARGET_FIELD_MAPPING[field]] = value
+            if not payload:
+                results[sku_b] = {"success": True, "error": None}
+                continue
+            prepared.append((sku_b, existing_product, payload))
+        
+        if price_pipeline:
+            price_pipeline.apply([payload for _, _, payload in prepared])
+        
+        updates = []
+        for sku_b, existing_product, payload in prepared:
+            if not self.audit_log.record_update(dest_store, existing_product['id'], sku_b, existing_product, payload,
+                                                batch_id):
+                print(f"Not updating product {sku_b}: could not write audit log")
+                results[sku_b] = {"success": False, "error": "Could not write audit log"}
+                continue
+            updates.append((sku_b, dict(payload, id=existing_product['id'])))
+        
+        for start in range(0, len(updates), PRODUCT_UPDATE_BATCH_SIZE):
+            chunk = updates[start:start + PRODUCT_UPDATE_BATCH_SIZE]
+            result = dest.update_products([payload for _, payload in chunk])
+            skus = [sku for sku, _ in chunk]
+            # A renamed SKU must not keep serving its old cached lookup either
+            renamed = [payload['sku'] for _, payload in chunk if payload.get('sku')]
+            self.invalidate_cached_product(dest_store, *(skus + renamed))
+            success = bool(result and result.get("data") is not None)
+            for sku in skus:
+                results[sku] = {"success": success, "error": None if success else "Batch update request failed"}
+        return results
+    
     def get_store_display_name(self, store_name):
         """Get human-readable store name"""
         store_names = {
@@ -219,6 +627,7 @@ class ProductImporter:
             "availability": product.get("availability", "available"),
             "visible": product.get("is_visible", True),
             "custom_fields": product.get("custom_fields", []),
+            "bulk_pricing_rules": product.get("bulk_pricing_rules", []),
             "brand": product.get("brand", "")
         }
         
@@ -262,14 +671,37 @@ class ProductImporter:
             print(f"=== DEBUG: Including {len(extracted_data['custom_fields'])} custom fields in import ===")
             for cf in extracted_data["custom_fields"]:
                 print(f"  - {cf.get('name', 'Unknown')}: {cf.get('value', 'N/A')}")
+        if extracted_data.get("bulk_pricing_rules"):
+            # Source rule IDs mean nothing in the destination store
+            import_data["bulk_pricing_rules"] = [
+                {key: value for key, value in rule.items() if key != "id"}
+                for rule in extracted_data["bulk_pricing_rules"]
+            ]
             
         return import_data
     
     def import_product_by_sku(self, sku: str, show_details: bool = True, update_if_exists: bool = False) -> bool:
         """Import a product from source store to destination store using SKU. Update if exists if flag is set."""
+        started = time.time()
+        success = False
+        try:
+            success = self._import_product_by_sku(sku, show_details, update_if_exists)
+            return success
+        finally:
+            self.metrics.record_import(self.get_store_name(self.source_store), self.get_store_name(self.dest_store),
+                                       sku, success, time.time() - started)
+    
+    def _import_product_by_sku(self, sku: str, show_details: bool, update_if_exists: bool) -> bool:
+        try:
+            price_pipeline = build_price_pipeline(self.get_store_name(self.source_store),
+                                                  self.get_store_name(self.dest_store))
+        except ValueError as e:
+            print(f"Error preparing price transforms: {e}")
+            return False
         print(f"\nSearching for product with SKU: {sku}")
         # Get product from source store
-        source_product = self.source_store.get_product_by_sku(sku)
+        source_product = self.source_store.get_product_by_sku(
+            sku, include=PRODUCT_IMPORT_INCLUDE, include_fields=PRODUCT_IMPORT_FIELDS)
         if not source_product:
             print(f"Product with SKU '{sku}' not found in source store")
             return False
@@ -279,15 +711,28 @@ class ProductImporter:
         if show_details:
             self.display_product_details(extracted_data)
         # Check if product already exists in destination store
-        existing_product = self.dest_store.get_product_by_sku(sku)
+        if update_if_exists:
+            existing_product = self.dest_store.get_product_by_sku(
+                sku, include=PRODUCT_AUDIT_INCLUDE, include_fields=PRODUCT_AUDIT_FIELDS)
+        else:
+            existing_product = self.dest_store.get_product_by_sku(
+                sku, include=None, include_fields=PRODUCT_LOOKUP_FIELDS)
         if existing_product:
             print(f"Product with SKU '{sku}' already exists in destination store")
             print(f"   Existing product: {existing_product.get('name', 'Unknown')}")
             if update_if_exists:
                 # Prepare data for update
                 update_data = self.prepare_product_for_import(extracted_data)
+                update_data.pop("bulk_pricing_rules", None)
+                if price_pipeline:
+                    price_pipeline.apply([update_data])
                 print(f"Updating product in destination store...")
+                dest_store_name = self.get_store_name(self.dest_store)
+                if not self.audit_log.record_update(dest_store_name, existing_product['id'], sku, existing_product, update_data):
+                    print(f"Failed to update product (could not write audit log)")
+                    return False
                 result = self.dest_store.update_product(existing_product['id'], update_data)
+                self.invalidate_cached_product(dest_store_name, sku)
                 if result and result.get("data"):
                     print(f"Successfully updated product!")
                     print(f"   Updated product ID: {result['data'].get('id')}")
@@ -300,9 +745,12 @@ class ProductImporter:
                 return False
         # Prepare data for import
         import_data = self.prepare_product_for_import(extracted_data)
+        if price_pipeline:
+            price_pipeline.apply([import_data])
         print(f"Importing product to destination store...")
         # Create product in destination store
         result = self.dest_store.create_product(import_data)
+        self.invalidate_cached_product(self.get_store_name(self.dest_store), sku)
         if result and result.get("data"):
             print(f"Successfully imported product!")
             print(f"   New product ID: {result['data'].get('id')}")
@@ -323,44 +771,123 @@ class ProductImporter:
         print(f"   GTIN: {product_data.get('gtin', 'N/A')}")
         print(f"   URL: {product_data.get('url', 'N/A')}")
 
-    def import_product_between_stores(self, source_store_name: str, target_store_name: str, sku: str, update_if_exists: bool = False) -> bool:
+    def import_product_between_stores(self, source_store_name: str, target_store_name: str, sku: str, update_if_exists: bool = False,
+                                      batch_id: Optional[str] = None) -> bool:
         """Import a product from source store to target store using SKU"""
-        try:
-            source_store = self.get_store_by_name(source_store_name)
-            target_store = self.get_store_by_name(target_store_name)
-            
-            if not source_store or not target_store:
-                print(f"Invalid store names: {source_store_name}, {target_store_name}")
-                return False
-            
-            # Get product from source store
-            source_product = source_store.get_product_by_sku(sku)
-            if not source_product:
-                print(f"Product with SKU '{sku}' not found in source store")
-                return False
-            
-            # Check if product already exists in target store
-            existing_product = target_store.get_product_by_sku(sku)
-            if existing_product:
-                if update_if_exists:
-                    # Update existing product
-                    update_data = self.prepare_product_for_import(self.extract_product_fields(source_product))
-                    result = target_store.update_product(existing_product['id'], update_data)
-                    return result and result.get("data") is not None
+        results = self.import_products_between_stores(source_store_name, target_store_name, [sku], update_if_exists,
+                                                      batch_id=batch_id)
+        return results.get(sku, False)
+
+    @tags_job
+    def import_products_between_stores(self, source_store_name: str, target_store_name: str, skus: List[str],
+                                       update_if_exists: bool = False, chunk_size: int = 50,
+                                       batch_id: Optional[str] = None) -> Dict[str, bool]:
+        """Import several products from source store to target store, returning success per SKU.
+
+        SKUs are handled in chunks: every product in a chunk is fetched into a compact
+        ProductRecord first, the price transform stage for the store pair runs once
+        over the chunk's payloads, then the products are written. Each record and
+        payload is released as soon as its product is written, so memory stays
+        bounded by the chunk size however many SKUs are passed. Updates are audited,
+        and imports recorded in metrics, under `batch_id` (default: the importer's own).
+        Raises ValueError when the store pair's price transforms cannot be built
+        (e.g. no FX rate configured), since every SKU would fail for the same reason.
+        """
+        source_store = self.get_store_by_name(source_store_name)
+        target_store = self.get_store_by_name(target_store_name)
+        
+        if not source_store or not target_store:
+            print(f"Invalid store names: {source_store_name}, {target_store_name}")
+            return {sku: False for sku in skus}
+        
+        price_pipeline = build_price_pipeline(source_store_name, target_store_name)
+        
+        results = {}
+        for start in range(0, len(skus), chunk_size):
+            pending = []
+            durations = {}
+            for sku in skus[start:start + chunk_size]:
+                started = time.time()
+                try:
+                    prepared = self._prepare_store_import(source_store, target_store, sku, update_if_exists)
+                except Exception as e:
+                    print(f"Error importing product {sku}: {e}")
+                    prepared = None
+                durations[sku] = time.time() - started
+                if prepared is None:
+                    results[sku] = False
+                    self.metrics.record_import(source_store_name, target_store_name, sku, False, durations[sku], batch_id)
                 else:
-                    print(f"Product with SKU '{sku}' already exists in target store")
-                    return False
+                    pending.append((sku,) + prepared)
             
-            # Create new product
-            import_data = self.prepare_product_for_import(self.extract_product_fields(source_product))
-            result = target_store.create_product(import_data)
-            return result and result.get("data") is not None
+            payloads = [self._build_store_payload(record, existing_product) for _, existing_product, record in pending]
+            if price_pipeline:
+                price_pipeline.apply(payloads)
             
-        except Exception as e:
-            print(f"Error importing product {sku}: {e}")
-            return False
+            for index, (sku, existing_product, _) in enumerate(pending):
+                payload = payloads[index]
+                pending[index] = payloads[index] = None
+                started = time.time()
+                try:
+                    results[sku] = self._write_store_import(target_store_name, target_store, sku, existing_product, payload,
+                                                            batch_id)
+                except Exception as e:
+                    print(f"Error importing product {sku}: {e}")
+                    results[sku] = False
+                self.metrics.record_import(source_store_name, target_store_name, sku, results[sku],
+                                           durations[sku] + time.time() - started, batch_id)
+        return results
+
+    def _prepare_store_import(self, source_store: BigCommerceAPI, target_store: BigCommerceAPI, sku: str,
+                              update_if_exists: bool) -> Optional[Tuple[Optional[Dict[str, Any]], ProductRecord]]:
+        """Fetch a source product as a compact record; returns (existing target product or None, record)"""
+        # Get product from source store
+        source_product = source_store.get_product_by_sku(
+            sku, include=PRODUCT_IMPORT_INCLUDE, include_fields=PRODUCT_IMPORT_FIELDS)
+        if not source_product:
+            print(f"Product with SKU '{sku}' not found in source store")
+            return None
+        
+        # Check if product already exists in target store; updates need the current values for the audit log
+        if update_if_exists:
+            existing_product = target_store.get_product_by_sku(
+                sku, include=PRODUCT_AUDIT_INCLUDE, include_fields=PRODUCT_AUDIT_FIELDS)
+        else:
+            existing_product = target_store.get_product_by_sku(
+                sku, include=None, include_fields=PRODUCT_ID_FIELDS)
+        if existing_product and not update_if_exists:
+            print(f"Product with SKU '{sku}' already exists in target store")
+            return None
+        
+        record = ProductRecord.from_api(source_product)
+        return existing_product, record
+
+    def _build_store_payload(self, record: ProductRecord, existing_product: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create/update payload for a record"""
+        payload = self.prepare_product_for_import(record.as_extracted_fields())
+        if existing_product:
+            # Rules sent without IDs would be added next to the target's existing tiers
+            payload.pop("bulk_pricing_rules", None)
+        return payload
 
-    def update_target_product(self, store_name: str, sku: str, update_data: Dict[str, Any]) -> bool:
+    def _write_store_import(self, target_store_name: str, target_store: BigCommerceAPI, sku: str,
+                            existing_product: Optional[Dict[str, Any]], payload: Dict[str, Any],
+                            batch_id: Optional[str] = None) -> bool:
+        """Create or update one prepared product in the target store"""
+        if existing_product:
+            if not self.audit_log.record_update(target_store_name, existing_product['id'], sku, existing_product, payload,
+                                                batch_id):
+                print(f"Skipping update of {sku}: could not write audit log")
+                return False
+            result = target_store.update_product(existing_product['id'], payload)
+        else:
+            result = target_store.create_product(payload)
+        self.invalidate_cached_product(target_store_name, sku)
+        return bool(result and result.get("data") is not None)
+
+    @tags_job
+    def update_target_product(self, store_name: str, sku: str, update_data: Dict[str, Any],
+                              batch_id: Optional[str] = None) -> bool:
         """Update a product in the target store with the provided data"""
         try:
             print(f"=== DEBUG: update_target_product called ===")
@@ -376,7 +903,8 @@ class ProductImporter:
             print(f"=== DEBUG: Store object retrieved successfully: {type(store)} ===")
             
             # Get the existing product
-            existing_product = store.get_product_by_sku(sku)
+            existing_product = store.get_product_by_sku(
+                sku, include=PRODUCT_TARGET_UPDATE_INCLUDE, include_fields=PRODUCT_AUDIT_FIELDS)
             if not existing_product:
                 print(f"Product with SKU '{sku}' not found in store '{store_name}'")
                 return False
@@ -391,22 +919,7 @@ class ProductImporter:
             print(f"=== DEBUG: Initializing update_payload: {type(update_payload)} ===")
             
             # Map the form fields to BigCommerce API fields
-            field_mapping = {
-                'name': 'name',
-                'price': 'price',
-                'brand': 'brand_name',  # BigCommerce uses brand_name for brand
-                'description': 'description',
-                'sku': 'sku',
-                'mpn': 'mpn',
-                'upc': 'upc',
-                'gtin': 'gtin',
-                'weight': 'weight',
-                'width': 'width',
-                'height': 'height',
-                'depth': 'depth',
-                'custom_fields': 'custom_fields',
-                'images': 'images'
-            }
+            field_mapping = TARGET_FIELD_MAPPING
             
             print(f"=== DEBUG: Starting field mapping process ===")
             
@@ -458,10 +971,16 @@ class ProductImporter:
                 print(f"No product ID found in existing product data")
                 return False
                 
+            if not self.audit_log.record_update(store_name, product_id, sku, existing_product, update_payload, batch_id):
+                print(f"Not updating product {sku}: could not write audit log")
+                return False
+            
             print(f"=== DEBUG: About to call store.update_product with ID: {product_id} ===")
             
             # Update the product
             result = store.update_product(product_id, update_payload)
+            # The SKU itself may have been renamed, so drop both keys
+            self.invalidate_cached_product(store_name, sku, update_payload.get('sku'))
             
             print(f"=== DEBUG: BigCommerce API response: {result} ===")
             
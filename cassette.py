@@ -0,0 +1,173 @@
+"""
+Record/replay of BigCommerce API traffic
+
+In record mode every request BigCommerceAPI makes, and the response it got,
+is appended to a gzip-compressed JSON-lines cassette. In replay mode the
+cassette answers the same requests without touching the network, either at
+full speed or with the originally recorded latency, so ProductImporter flows
+can be profiled and regression-tested offline against real catalog shapes.
+
+Requests are matched on store name, method, path, query parameters and body;
+repeated identical requests are answered in recorded order. Credentials are
+never written to the cassette, and entries are keyed by store name rather than
+store hash, so a cassette replays without any store credentials configured.
+Replayed writes still go through the audit log and metrics; point
+AUDIT_LOG_PATH and METRICS_DB_PATH elsewhere when profiling.
+
+Configuration (environment / .env):
+    BIGCOMMERCE_CASSETTE          cassette file, e.g. traffic.jsonl.gz
+    BIGCOMMERCE_CASSETTE_MODE     record or replay
+    BIGCOMMERCE_REPLAY_TIMING     fast (default) or original
+
+Example:
+    BIGCOMMERCE_CASSETTE=run.jsonl.gz BIGCOMMERCE_CASSETTE_MODE=record python batch_import.py --file skus.txt
+    BIGCOMMERCE_CASSETTE=run.jsonl.gz BIGCOMMERCE_CASSETTE_MODE=replay python batch_import.py --file skus.txt
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+from urllib.parse import urlencode
+from typing import Dict, Optional, Any
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent recorders are not locked against each other
+    fcntl = None
+
+CASSETTE_MODES = ("record", "replay")
+REPLAY_TIMINGS = ("fast", "original")
+
+# Response headers worth keeping (content type and rate-limit accounting)
+RECORDED_HEADERS = ("Content-Type", "X-Rate-Limit-Requests-Quota", "X-Rate-Limit-Requests-Left",
+                    "X-Rate-Limit-Time-Window-Ms", "X-Rate-Limit-Time-Reset-Ms")
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Replay found no recorded response for a request"""
+
+
+def request_key(store_name: str, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                body: Any = None) -> str:
+    """Canonical identity of a request, independent of credentials and store hash"""
+    key = f"{store_name} {method.upper()} {path}"
+    if params:
+        key += "?" + urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+    if body is not None:
+        key += " " + hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+    return key
+
+
+class Cassette:
+    """A recorded set of request/response pairs shared by all stores"""
+
+    def __init__(self, path: str, mode: str = "replay", timing: str = "fast"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {', '.join(CASSETTE_MODES)}")
+        if timing not in REPLAY_TIMINGS:
+            raise ValueError(f"Unknown replay timing '{timing}', expected one of {', '.join(REPLAY_TIMINGS)}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self._lock = threading.Lock()
+        self._entries = {}
+        if mode == "replay":
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """Cassette configured by BIGCOMMERCE_CASSETTE*, or None when not configured"""
+        path = os.getenv("BIGCOMMERCE_CASSETTE")
+        if not path:
+            return None
+        return cls(
+            path,
+            mode=os.getenv("BIGCOMMERCE_CASSETTE_MODE", "replay"),
+            timing=os.getenv("BIGCOMMERCE_REPLAY_TIMING", "fast")
+        )
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def for_store(self, store_name: str) -> "StoreCassette":
+        """Cassette bound to one store, suitable for BigCommerceAPI.cassette"""
+        return StoreCassette(self, store_name)
+
+    def _load(self):
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._entries.setdefault(entry["key"], deque()).append(entry)
+                count += 1
+        print(f"Replaying {count} recorded request(s) from {self.path}")
+
+    def record(self, key: str, response: requests.Response, elapsed: float):
+        """Append one request/response pair"""
+        entry = {
+            "key": key,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            "body": response.text,
+            "elapsed": elapsed
+        }
+        # One gzip member per entry keeps appends from several processes independent
+        data = gzip.compress((json.dumps(entry) + "\n").encode("utf-8"))
+        with self._lock, open(self.path, "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(data)
+
+    def replay(self, key: str, method: str, url: str, **kwargs) -> requests.Response:
+        """Serve the recorded response for a request"""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded response for {key}")
+            # Identical requests are answered in recorded order; the last answer repeats
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+        if self.timing == "original":
+            time.sleep(entry["elapsed"])
+
+        response = requests.models.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason")
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = url
+        response.request = requests.Request(method, url, params=kwargs.get("params"), json=kwargs.get("json")).prepare()
+        return response
+
+
+class StoreCassette:
+    """A Cassette bound to a single store"""
+
+    def __init__(self, cassette: Cassette, store_name: str):
+        self.cassette = cassette
+        self.store_name = store_name
+
+    @property
+    def replaying(self) -> bool:
+        return self.cassette.replaying
+
+    def key(self, method: str, url: str, **kwargs) -> str:
+        # Drop the store-hash prefix so recordings replay under any credentials
+        path = url.split("/v3", 1)[-1]
+        return request_key(self.store_name, method, path, kwargs.get("params"), kwargs.get("json"))
+
+    def record(self, method: str, url: str, response: requests.Response, elapsed: float, **kwargs):
+        self.cassette.record(self.key(method, url, **kwargs), response, elapsed)
+
+    def replay(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self.cassette.replay(self.key(method, url, **kwargs), method, url, **kwargs)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+BigCommerce Catalog Diff Report
+
+Compares the full catalogs of two stores in two paged scans. The target catalog
+is loaded into a hash index keyed by SKU (or another identifier), then the
+source catalog is streamed against it to find products that are missing from
+the target, extra in the target, or whose fields have drifted. Identifier values
+shared by several products are reported as duplicates. Source prices are run
+through the store pair's price pipeline before comparing; if the stores use
+different currencies and no FX rate is configured, prices are left out of the
+diff. If either scan fails part-way, no report is written.
+
+Usage:
+    python catalog_diff.py wilson_us signal_us
+    python catalog_diff.py wilson_us signal_us --output diff.csv
+    python catalog_diff.py wilson_us signal_us --output diff.json --key mpn
+"""
+
+import sys
+import csv
+import json
+from typing import Dict, Iterable, List, Optional, Any
+import requests
+from bigcommerce_import_tool import ProductImporter
+from price_transforms import PricePipeline, build_price_pipeline
+from product_record import ProductRecord
+
+# Product fields compared between the two stores
+DIFF_FIELDS = ["name", "description", "price", "upc", "mpn", "gtin", "weight",
+               "type", "availability", "is_visible"]
+
+KEY_FIELDS = ("sku", "mpn", "upc", "gtin")
+
+
+def normalize_value(value: Any) -> Any:
+    """Comparable form of a field value"""
+    if isinstance(value, float):
+        return round(value, 4)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def product_signature(product: Dict[str, Any]) -> ProductRecord:
+    """Compact per-product record held in the index; descriptions are kept only as a digest"""
+    return ProductRecord.from_api(product, keep_description=False)
+
+
+def fields_differ(source: ProductRecord, target: ProductRecord, field: str,
+                  price_pipeline: Optional[PricePipeline] = None) -> bool:
+    """Whether a field differs between the two records after normalization.
+
+    The source price is compared as the price a sync would write to the target.
+    """
+    source_value = source.diff_value(field)
+    if field == "price" and price_pipeline and source_value not in (None, ""):
+        source_value = float(price_pipeline.apply([{"price": str(source_value)}])[0]["price"])
+    return normalize_value(source_value) != normalize_value(target.diff_value(field))
+
+
+def take_target(candidates: List[ProductRecord], source: ProductRecord, key: str) -> ProductRecord:
+    """Remove and return the target record to pair with source, preferring one with the same SKU"""
+    if key != "sku":
+        for index, candidate in enumerate(candidates):
+            if candidate.sku == source.sku:
+                return candidates.pop(index)
+    return candidates.pop(0)
+
+
+def diff_catalogs(source_products: Iterable[Dict[str, Any]], target_products: Iterable[Dict[str, Any]],
+                  key: str = "sku", fields: Optional[List[str]] = None,
+                  price_pipeline: Optional[PricePipeline] = None) -> Dict[str, Any]:
+    """Join two product streams on `key` and report missing, extra and drifted products.
+
+    `fields` defaults to DIFF_FIELDS; `price_pipeline` converts source prices
+    into the target's currency and rounding before they are compared.
+
+    Keys shared by several products in either store (common for mpn/upc/gtin)
+    are paired one-to-one, preferring records with the same SKU, and each such
+    key is also reported once with status "duplicate".
+    """
+    fields = DIFF_FIELDS if fields is None else fields
+    index = {}
+    target_count = 0
+    for product in target_products:
+        value = product.get(key)
+        if value:
+            target_count += 1
+            index.setdefault(str(value).strip(), []).append(product_signature(product))
+    target_ids = {value: [record.id for record in records] for value, records in index.items()}
+
+    rows = []
+    source_ids = {}
+    field_counts = {field: 0 for field in fields}
+    counts = {"source_products": 0, "target_products": target_count,
+              "matched": 0, "missing": 0, "extra": 0, "drifted": 0, "duplicate": 0}
+
+    for product in source_products:
+        value = product.get(key)
+        if not value:
+            continue
+        value = str(value).strip()
+        counts["source_products"] += 1
+        source = product_signature(product)
+        source_ids.setdefault(value, []).append(source.id)
+        candidates = index.get(value)
+        if not candidates:
+            counts["missing"] += 1
+            rows.append({"status": "missing", "key": value, "source_id": source.id,
+                         "target_id": None, "fields": []})
+            continue
+        target = take_target(candidates, source, key)
+        counts["matched"] += 1
+        drifted = [field for field in fields if fields_differ(source, target, field, price_pipeline)]
+        if drifted:
+            counts["drifted"] += 1
+            for field in drifted:
+                field_counts[field] += 1
+            rows.append({"status": "drifted", "key": value, "source_id": source.id,
+                         "target_id": target.id, "fields": drifted})
+
+    # Whatever is left in the index only exists in the target
+    for value, records in index.items():
+        for target in records:
+            counts["extra"] += 1
+            rows.append({"status": "extra", "key": value, "source_id": None,
+                         "target_id": target.id, "fields": []})
+
+    for value in sorted(set(source_ids) | set(target_ids)):
+        if len(source_ids.get(value, [])) > 1 or len(target_ids.get(value, [])) > 1:
+            counts["duplicate"] += 1
+            rows.append({"status": "duplicate", "key": value, "source_id": source_ids.get(value, []),
+                         "target_id": target_ids.get(value, []), "fields": []})
+
+    return {"key": key, "summary": counts, "field_drift": field_counts, "rows": rows}
+
+
+def format_ids(value: Any) -> Any:
+    """CSV form of a row's product ID, or of the ID list on duplicate rows"""
+    if isinstance(value, list):
+        return ";".join(str(product_id) for product_id in value)
+    return value
+
+
+def write_report(report: Dict[str, Any], filename: str):
+    """Write the report as CSV (one row per difference) or JSON, by file extension"""
+    if filename.endswith(".json"):
+        with open(filename, "w") as f:
+            json.dump(report, f, indent=2)
+        return
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["status", report["key"], "source_id", "target_id", "drifted_fields"])
+        for row in report["rows"]:
+            writer.writerow([row["status"], row["key"], format_ids(row["source_id"]),
+                             format_ids(row["target_id"]), ";".join(row["fields"])])
+
+
+def get_option_value(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Return the value following a command line option, or default"""
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name)
+    if index + 1 >= len(sys.argv):
+        print(f"Please specify a value after {name}")
+        sys.exit(1)
+    return sys.argv[index + 1]
+
+
+def main():
+    positional = [arg for i, arg in enumerate(sys.argv[1:], 1)
+                  if not arg.startswith("--") and sys.argv[i - 1] not in ("--output", "--key")]
+    if len(positional) != 2:
+        print("Usage: python catalog_diff.py <source_store> <target_store> [--output report.csv|report.json] [--key sku|mpn|upc|gtin]")
+        sys.exit(1)
+
+    source_name, target_name = positional
+    key = get_option_value("--key", "sku")
+    output = get_option_value("--output")
+    if key not in KEY_FIELDS:
+        print(f"--key must be one of: {', '.join(KEY_FIELDS)}")
+        sys.exit(1)
+
+    importer = ProductImporter()
+    source_store = importer.get_store_by_name(source_name)
+    target_store = importer.get_store_by_name(target_name)
+    if not source_store or not target_store:
+        print(f"Invalid store names: {source_name}, {target_name}")
+        sys.exit(1)
+
+    fields = list(DIFF_FIELDS)
+    try:
+        price_pipeline = build_price_pipeline(source_name, target_name)
+    except ValueError as e:
+        # Raw prices in different currencies would all show as drifted
+        print(f"Prices not compared: {e}")
+        price_pipeline = None
+        fields.remove("price")
+
+    include_fields = ",".join(sorted(set(fields) | {"sku", key}))
+    print(f"🔍 Diffing {importer.get_store_display_name(source_name)} against "
+          f"{importer.get_store_display_name(target_name)} by {key}...")
+    try:
+        report = diff_catalogs(
+            source_store.iter_products(include_fields=include_fields),
+            target_store.iter_products(include_fields=include_fields),
+            key=key,
+            fields=fields,
+            price_pipeline=price_pipeline
+        )
+    except requests.exceptions.RequestException as e:
+        # A partial listing would fill the report with false missing/extra rows
+        print(f"Catalog scan failed, no report written: {e}")
+        sys.exit(1)
+
+    summary = report["summary"]
+    print(f"\n{'='*60}")
+    print(f"CATALOG DIFF SUMMARY")
+    print(f"{'='*60}")
+    print(f"Source products: {summary['source_products']}")
+    print(f"Target products: {summary['target_products']}")
+    print(f"Missing in target: {summary['missing']}")
+    print(f"Extra in target: {summary['extra']}")
+    print(f"Drifted: {summary['drifted']}")
+    print(f"Duplicate {key} values: {summary['duplicate']}")
+    for field, count in report["field_drift"].items():
+        if count:
+            print(f"   - {field}: {count}")
+
+    if output:
+        write_report(report, output)
+        print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
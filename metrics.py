@@ -0,0 +1,227 @@
+"""
+Import and API traffic metrics
+
+Every BigCommerce request (status, duration, bytes each way, rate-limit quota)
+and every product import (timing and outcome) is recorded in a local SQLite
+time-series file. Batch runs, the sync service and the Flask app all write to
+the same file, and the /metrics page reads it back as per-job and per-store
+throughput, slowest SKUs and quota utilization.
+
+Events are buffered in memory and written in small transactions. Each event is
+tagged with the job ID of the import or batch call that caused it (see
+job_context), so concurrent jobs sharing one recorder stay apart.
+
+Configuration (environment / .env):
+    METRICS_DB_PATH   SQLite file (default: import_tool_metrics.sqlite3 in the temp dir)
+"""
+
+import os
+import time
+import atexit
+import sqlite3
+import tempfile
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any
+
+DEFAULT_METRICS_PATH = os.path.join(tempfile.gettempdir(), "import_tool_metrics.sqlite3")
+
+# Buffered events are written once either limit is reached
+FLUSH_EVENTS = 100
+FLUSH_SECONDS = 5
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS api_requests ("
+    " ts REAL NOT NULL, job_id TEXT, store TEXT NOT NULL, method TEXT NOT NULL,"
+    " status INTEGER NOT NULL, duration REAL NOT NULL, bytes_sent INTEGER NOT NULL,"
+    " bytes_received INTEGER NOT NULL, quota INTEGER, quota_left INTEGER)",
+    "CREATE INDEX IF NOT EXISTS api_requests_ts ON api_requests (ts)",
+    "CREATE TABLE IF NOT EXISTS imports ("
+    " ts REAL NOT NULL, job_id TEXT, source_store TEXT, target_store TEXT NOT NULL,"
+    " sku TEXT NOT NULL, success INTEGER NOT NULL, duration REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS imports_ts ON imports (ts)"
+]
+
+
+# Job ID of the import or batch call running in this thread or task
+current_job_id: contextvars.ContextVar = contextvars.ContextVar("import_tool_job_id", default=None)
+
+
+@contextmanager
+def job_context(job_id: Optional[str]):
+    """Tag metrics recorded inside the block with job_id (None keeps the enclosing job)"""
+    if not job_id:
+        yield
+        return
+    token = current_job_id.set(job_id)
+    try:
+        yield
+    finally:
+        current_job_id.reset(token)
+
+
+def tags_job(method):
+    """Run an importer method under job_context of its batch_id keyword argument"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with job_context(kwargs.get("batch_id")):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def header_int(headers, name: str) -> Optional[int]:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class MetricsRecorder:
+    """Buffers request and import events and writes them to SQLite"""
+
+    def __init__(self, path: str = DEFAULT_METRICS_PATH, job_id: Optional[str] = None):
+        self.path = path
+        self.job_id = job_id
+        self.enabled = True
+        self._requests = []
+        self._imports = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        try:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                for statement in SCHEMA:
+                    conn.execute(statement)
+        except sqlite3.Error as e:
+            print(f"Metrics disabled, could not open {path}: {e}")
+            self.enabled = False
+        atexit.register(self.flush)
+
+    @classmethod
+    def from_env(cls) -> "MetricsRecorder":
+        return cls(path=os.getenv("METRICS_DB_PATH", DEFAULT_METRICS_PATH))
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def for_store(self, store_name: str) -> "StoreMetrics":
+        """Recorder bound to one store, suitable for BigCommerceAPI.metrics"""
+        return StoreMetrics(self, store_name)
+
+    def record_request(self, store_name: str, method: str, status: int, duration: float,
+                       bytes_sent: int, bytes_received: int, quota: Optional[int] = None,
+                       quota_left: Optional[int] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._requests.append((time.time(), current_job_id.get() or self.job_id, store_name, method, status, duration,
+                                   bytes_sent, bytes_received, quota, quota_left))
+        self._maybe_flush()
+
+    def record_import(self, source_store: Optional[str], target_store: str, sku: str,
+                      success: bool, duration: float, job_id: Optional[str] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._imports.append((time.time(), job_id or current_job_id.get() or self.job_id, source_store, target_store, sku,
+                                  int(bool(success)), duration))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._requests) + len(self._imports) >= FLUSH_EVENTS or time.time() - self._last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """Write buffered events to the database"""
+        with self._lock:
+            requests, self._requests = self._requests, []
+            imports, self._imports = self._imports, []
+            self._last_flush = time.time()
+        if not requests and not imports:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany("INSERT INTO api_requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", requests)
+                conn.executemany("INSERT INTO imports VALUES (?, ?, ?, ?, ?, ?, ?)", imports)
+        except sqlite3.Error as e:
+            print(f"Error writing metrics to {self.path}: {e}")
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        self.flush()
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def _filters(self, since: float, job_id: Optional[str]):
+        clause = "ts >= ?"
+        params = [since]
+        if job_id:
+            clause += " AND job_id = ?"
+            params.append(job_id)
+        return clause, params
+
+    def jobs(self, since: float) -> List[Dict[str, Any]]:
+        """Per-job import totals, most recent first"""
+        return self._query(
+            "SELECT job_id, MIN(ts) AS started, MAX(ts) AS finished, COUNT(*) AS imports,"
+            " SUM(success) AS succeeded, AVG(duration) AS avg_duration"
+            " FROM imports WHERE ts >= ? AND job_id IS NOT NULL"
+            " GROUP BY job_id ORDER BY started DESC", (since,))
+
+    def import_throughput(self, since: float, job_id: Optional[str] = None, bucket: int = 60) -> List[Dict[str, Any]]:
+        """Imports per time bucket"""
+        clause, params = self._filters(since, job_id)
+        return self._query(
+            f"SELECT CAST(ts / {bucket} AS INTEGER) * {bucket} AS bucket, COUNT(*) AS imports,"
+            f" SUM(success) AS succeeded FROM imports WHERE {clause}"
+            " GROUP BY bucket ORDER BY bucket", tuple(params))
+
+    def store_summary(self, since: float, job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-store request counts, 429s, bytes and quota utilization"""
+        clause, params = self._filters(since, job_id)
+        return self._query(
+            "SELECT store, COUNT(*) AS requests,"
+            " SUM(CASE WHEN status = 429 THEN 1 ELSE 0 END) AS throttled,"
+            " SUM(CASE WHEN status >= 400 OR status = 0 THEN 1 ELSE 0 END) AS errors,"
+            " SUM(bytes_sent) AS bytes_sent, SUM(bytes_received) AS bytes_received,"
+            " AVG(duration) AS avg_duration,"
+            " MAX(1.0 - CAST(quota_left AS REAL) / quota) AS peak_quota_used,"
+            " AVG(1.0 - CAST(quota_left AS REAL) / quota) AS avg_quota_used"
+            f" FROM api_requests WHERE {clause} GROUP BY store ORDER BY store", tuple(params))
+
+    def store_throughput(self, since: float, job_id: Optional[str] = None, bucket: int = 60) -> List[Dict[str, Any]]:
+        """Requests and 429s per store per time bucket"""
+        clause, params = self._filters(since, job_id)
+        return self._query(
+            f"SELECT store, CAST(ts / {bucket} AS INTEGER) * {bucket} AS bucket, COUNT(*) AS requests,"
+            " SUM(CASE WHEN status = 429 THEN 1 ELSE 0 END) AS throttled"
+            f" FROM api_requests WHERE {clause} GROUP BY store, bucket ORDER BY bucket, store", tuple(params))
+
+    def slowest_imports(self, since: float, job_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        clause, params = self._filters(since, job_id)
+        return self._query(
+            "SELECT ts, job_id, source_store, target_store, sku, success, duration"
+            f" FROM imports WHERE {clause} ORDER BY duration DESC LIMIT ?", tuple(params) + (limit,))
+
+
+class StoreMetrics:
+    """A MetricsRecorder bound to a single store"""
+
+    def __init__(self, recorder: MetricsRecorder, store_name: str):
+        self.recorder = recorder
+        self.store_name = store_name
+
+    def record_response(self, method: str, response, duration: float):
+        """Record a completed request; response is None if it failed before a reply"""
+        if response is None:
+            self.recorder.record_request(self.store_name, method, 0, duration, 0, 0)
+            return
+        body = response.request.body if response.request is not None else None
+        self.recorder.record_request(
+            self.store_name, method, response.status_code, duration,
+            len(body or b""), len(response.content or b""),
+            header_int(response.headers, "X-Rate-Limit-Requests-Quota"),
+            header_int(response.headers, "X-Rate-Limit-Requests-Left")
+        )
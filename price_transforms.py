@@ -0,0 +1,140 @@
+"""
+Price transform stage for cross-store imports
+
+Prepared import payloads carry the source store's prices verbatim. When the
+target store sells in another currency, or uses different price endings, the
+transforms here rewrite a whole batch of payloads in one pass before anything
+is written, so no follow-up price update is needed per product.
+
+Each transform handles `price` (and the other money fields when present) plus
+the monetary bulk pricing tiers; percentage tiers are left untouched. "price"
+tiers are an amount off rather than a price, so they are converted but only
+ever rounded to cents; price endings apply to unit prices and "fixed" tiers.
+
+Configuration (environment / .env):
+    FX_RATES               conversion rates, e.g. "USD:CAD=1.37,CAD:USD=0.73"
+    PRICE_ROUNDING_<CUR>   rounding for a target currency: cents (default), whole or 99
+"""
+
+import os
+from decimal import Decimal, ROUND_HALF_UP, ROUND_FLOOR
+from typing import Dict, List, Optional, Any
+
+STORE_CURRENCIES = {
+    'wilson_us': 'USD',
+    'signal_us': 'USD',
+    'wilson_ca': 'CAD',
+    'signal_ca': 'CAD'
+}
+
+MONEY_FIELDS = ("price", "sale_price", "retail_price", "cost_price")
+
+# Bulk pricing rule types whose amount is money ("percent" is a ratio)
+MONEY_BULK_RULE_TYPES = ("price", "fixed")
+
+ROUNDING_MODES = ("cents", "whole", "99")
+
+CENT = Decimal("0.01")
+
+
+class PriceTransform:
+    """Base class: rewrites money amounts in a batch of prepared payloads in place"""
+
+    def convert(self, amount: Decimal) -> Decimal:
+        raise NotImplementedError
+
+    def convert_rule_amount(self, rule_type: str, amount: Decimal) -> Decimal:
+        """Transform a bulk pricing tier amount; same as a price unless overridden"""
+        return self.convert(amount)
+
+    def apply(self, payloads: List[Dict[str, Any]]):
+        for payload in payloads:
+            for field in MONEY_FIELDS:
+                if payload.get(field) not in (None, ""):
+                    # Keep the payload's own representation (prepare sends price as a string)
+                    converted = self.convert(Decimal(str(payload[field])))
+                    payload[field] = str(converted) if isinstance(payload[field], str) else float(converted)
+            for rule in payload.get("bulk_pricing_rules", []):
+                if rule.get("type") in MONEY_BULK_RULE_TYPES and rule.get("amount") is not None:
+                    rule["amount"] = float(self.convert_rule_amount(rule["type"], Decimal(str(rule["amount"]))))
+
+
+class FxConversion(PriceTransform):
+    """Multiply money amounts by a currency exchange rate"""
+
+    def __init__(self, rate: float):
+        self.rate = Decimal(str(rate))
+
+    def convert(self, amount: Decimal) -> Decimal:
+        return amount * self.rate
+
+
+class PriceRounding(PriceTransform):
+    """Round money amounts to cents, whole units, or a .99 ending"""
+
+    def __init__(self, mode: str = "cents"):
+        if mode not in ROUNDING_MODES:
+            raise ValueError(f"Unknown rounding mode '{mode}', expected one of {', '.join(ROUNDING_MODES)}")
+        self.mode = mode
+
+    def convert(self, amount: Decimal) -> Decimal:
+        if self.mode == "whole":
+            return amount.quantize(Decimal("1"), rounding=ROUND_HALF_UP).quantize(CENT)
+        if self.mode == "99":
+            if amount < 1:
+                return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+            return amount.quantize(Decimal("1"), rounding=ROUND_FLOOR) + Decimal("0.99")
+        return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+    def convert_rule_amount(self, rule_type: str, amount: Decimal) -> Decimal:
+        # An amount off keeps its value; a .99 or whole ending would change the discount
+        if rule_type == "price":
+            return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+        return self.convert(amount)
+
+
+class PricePipeline:
+    """Ordered list of transforms applied to a batch of payloads"""
+
+    def __init__(self, transforms: List[PriceTransform]):
+        self.transforms = transforms
+
+    def apply(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for transform in self.transforms:
+            transform.apply(payloads)
+        return payloads
+
+
+def parse_fx_rates(value: str) -> Dict[tuple, float]:
+    """Parse "USD:CAD=1.37,CAD:USD=0.73" into {(from, to): rate}"""
+    rates = {}
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        pair, _, rate = item.partition("=")
+        source, _, target = pair.partition(":")
+        if not source or not target or not rate:
+            raise ValueError(f"Invalid FX rate '{item}', expected FROM:TO=rate")
+        rates[(source.strip().upper(), target.strip().upper())] = float(rate)
+    return rates
+
+
+def build_price_pipeline(source_store_name: str, target_store_name: str) -> Optional[PricePipeline]:
+    """Transforms needed to move prices from one store to another, or None if prices copy as-is"""
+    source_currency = STORE_CURRENCIES.get(source_store_name)
+    target_currency = STORE_CURRENCIES.get(target_store_name)
+    transforms = []
+
+    if source_currency and target_currency and source_currency != target_currency:
+        rates = parse_fx_rates(os.getenv("FX_RATES", ""))
+        rate = rates.get((source_currency, target_currency))
+        if rate is None:
+            raise ValueError(f"No FX rate configured for {source_currency}:{target_currency} (set FX_RATES)")
+        transforms.append(FxConversion(rate))
+
+    rounding = os.getenv(f"PRICE_ROUNDING_{target_currency}") if target_currency else None
+    if rounding or transforms:
+        transforms.append(PriceRounding(rounding or "cents"))
+
+    return PricePipeline(transforms) if transforms else None
@@ -0,0 +1,111 @@
+"""
+Short-TTL product response cache
+
+Caches product lookups keyed by (store, sku) in a local SQLite file so that
+every gunicorn worker on the host shares the same entries. The compare UI
+re-posts the same SKU pair repeatedly while operators tweak sync checkboxes;
+serving those repeats from the cache avoids hitting BigCommerce each time.
+
+Lookups that found no product are cached too, as a "not found" entry, so
+repeated compares of a SKU missing from the target don't re-query it either.
+Entries expire after a few seconds and are invalidated explicitly whenever the
+import tool writes to a product (including creating one).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import tempfile
+from typing import Dict, Optional, Any
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "import_tool_product_cache.sqlite3")
+DEFAULT_CACHE_TTL = 30
+
+# Returned by ProductCache.get when nothing is cached; None means "cached as not found"
+CACHE_MISS = object()
+
+
+class ProductCache:
+    """SQLite-backed (store, sku) -> product cache shared across processes"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.enabled = ttl > 0
+        if self.enabled:
+            try:
+                self._init_db()
+            except sqlite3.Error as e:
+                print(f"Product cache disabled, could not open {path}: {e}")
+                self.enabled = False
+
+    @classmethod
+    def from_env(cls) -> "ProductCache":
+        """Build a cache from PRODUCT_CACHE_PATH / PRODUCT_CACHE_TTL (seconds, 0 disables)"""
+        path = os.getenv("PRODUCT_CACHE_PATH", DEFAULT_CACHE_PATH)
+        ttl = float(os.getenv("PRODUCT_CACHE_TTL", DEFAULT_CACHE_TTL))
+        return cls(path=path, ttl=ttl)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS product_cache ("
+                " store TEXT NOT NULL,"
+                " sku TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " body TEXT NOT NULL,"
+                " PRIMARY KEY (store, sku))"
+            )
+
+    def get(self, store_name: str, sku: str) -> Any:
+        """Return the cached product, None if cached as not found, or CACHE_MISS if missing/expired"""
+        if not self.enabled:
+            return CACHE_MISS
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT body, expires_at FROM product_cache WHERE store = ? AND sku = ?",
+                    (store_name, sku)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Product cache read failed for {store_name}/{sku}: {e}")
+            return CACHE_MISS
+        if not row or row[1] < time.time():
+            return CACHE_MISS
+        return json.loads(row[0])
+
+    def set(self, store_name: str, sku: str, product: Optional[Dict[str, Any]]):
+        """Store a product, or None for "not found", for the configured TTL"""
+        if not self.enabled:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO product_cache (store, sku, expires_at, body) VALUES (?, ?, ?, ?)",
+                    (store_name, sku, time.time() + self.ttl, json.dumps(product))
+                )
+                # Opportunistically drop expired rows so the file stays small
+                conn.execute("DELETE FROM product_cache WHERE expires_at < ?", (time.time(),))
+        except sqlite3.Error as e:
+            print(f"Product cache write failed for {store_name}/{sku}: {e}")
+
+    def invalidate(self, store_name: str, *skus: str):
+        """Drop cached entries for the given SKUs in a store"""
+        if not self.enabled:
+            return
+        skus = [sku for sku in skus if sku]
+        if not skus:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "DELETE FROM product_cache WHERE store = ? AND sku = ?",
+                    [(store_name, sku) for sku in skus]
+                )
+        except sqlite3.Error as e:
+            print(f"Product cache invalidation failed for {store_name}/{skus}: {e}")
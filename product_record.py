@@ -0,0 +1,85 @@
+"""
+Compact product representation for large batch runs
+
+A full BigCommerce product response carries variants, image lists and other
+data the import never uses. ProductRecord keeps only the import-relevant
+fields in a slotted object, so batches hold one small record per SKU instead of
+the raw response plus its extracted and prepared copies.
+
+Large text is fingerprinted: the description digest is what diffs compare, and
+records built for diffing only can drop the description body entirely.
+"""
+
+import hashlib
+from typing import Dict, Optional, Any
+
+
+def text_digest(text: Optional[str]) -> str:
+    """Stable fingerprint of a large text field"""
+    return hashlib.sha1((text or "").strip().encode("utf-8")).hexdigest()
+
+
+class ProductRecord:
+    """Import-relevant fields of one product"""
+
+    __slots__ = (
+        "id", "sku", "name", "description", "description_hash", "upc", "mpn", "gtin",
+        "type", "weight", "price", "categories", "availability", "is_visible",
+        "custom_fields", "bulk_pricing_rules", "brand"
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_api(cls, product: Dict[str, Any], keep_description: bool = True) -> "ProductRecord":
+        """Build a record from a BigCommerce product response"""
+        description = product.get("description", "")
+        return cls(
+            id=product.get("id"),
+            sku=product.get("sku", ""),
+            name=product.get("name", ""),
+            description=description if keep_description else None,
+            description_hash=text_digest(description),
+            upc=product.get("upc", ""),
+            mpn=product.get("mpn", ""),
+            gtin=product.get("gtin", ""),
+            type=product.get("type", "physical"),
+            weight=product.get("weight", 0),
+            price=product.get("price", 0),
+            categories=product.get("categories", []),
+            availability=product.get("availability", "available"),
+            is_visible=product.get("is_visible", True),
+            custom_fields=product.get("custom_fields", []),
+            bulk_pricing_rules=product.get("bulk_pricing_rules", []),
+            brand=product.get("brand", "")
+        )
+
+    def diff_value(self, field: str) -> Any:
+        """Value used when comparing this field across stores (digest for the description)"""
+        if field == "description":
+            return self.description_hash
+        return getattr(self, field)
+
+    def as_extracted_fields(self) -> Dict[str, Any]:
+        """Same shape as ProductImporter.extract_product_fields, minus the storefront URL"""
+        if self.description is None:
+            raise ValueError(f"Record for SKU '{self.sku}' was built without its description")
+        return {
+            "name": self.name,
+            "description": self.description,
+            "sku": self.sku,
+            "upc": self.upc,
+            "mpn": self.mpn,
+            "gtin": self.gtin,
+            "type": self.type,
+            "weight": self.weight,
+            "price": self.price,
+            "categories": self.categories,
+            "availability": self.availability,
+            "visible": self.is_visible,
+            "custom_fields": self.custom_fields,
+            "bulk_pricing_rules": self.bulk_pricing_rules,
+            "brand": self.brand
+        }
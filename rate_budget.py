@@ -0,0 +1,52 @@
+"""
+Store-level request budget shared between processes
+
+Each BigCommerce store has its own API quota. When several processes import
+from the same stores at once, they all draw request slots from one budget per
+store so the combined request rate stays under the configured limit.
+"""
+
+import time
+import multiprocessing
+from typing import Iterable
+
+
+class StoreRateBudget:
+    """Hands out evenly spaced request slots per store, across processes"""
+
+    def __init__(self, store_names: Iterable[str], requests_per_second: float):
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        self.interval = 1.0 / requests_per_second
+        self._lock = multiprocessing.Lock()
+        # Next free slot (epoch seconds) per store, in shared memory
+        self._next_slot = {
+            name: multiprocessing.Value('d', 0.0, lock=False) for name in store_names
+        }
+
+    def wait(self, store_name: str):
+        """Block until the store's next request slot is due"""
+        next_slot = self._next_slot.get(store_name)
+        if next_slot is None:
+            return
+        with self._lock:
+            now = time.time()
+            slot = max(now, next_slot.value)
+            next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def limiter_for(self, store_name: str) -> "StoreRateLimiter":
+        """Limiter bound to one store, suitable for BigCommerceAPI.rate_limiter"""
+        return StoreRateLimiter(self, store_name)
+
+
+class StoreRateLimiter:
+    """A StoreRateBudget bound to a single store"""
+
+    def __init__(self, budget: StoreRateBudget, store_name: str):
+        self.budget = budget
+        self.store_name = store_name
+
+    def wait(self):
+        self.budget.wait(self.store_name)
@@ -16,6 +16,33 @@ document.querySelectorAll('.nav-tab').forEach(tab => {
 
 
 
+// Last response + ETag per request, so repeat posts can be answered with 304
+var etagCache = {};
+
+// POST helper that revalidates against the server ETag and reuses the cached body on 304
+function postWithETag(url, data, success) {
+    var key = url + '?' + $.param(data);
+    var cached = etagCache[key];
+    
+    return $.ajax({
+        url: url,
+        type: 'POST',
+        data: data,
+        headers: cached ? {'If-None-Match': cached.etag} : {},
+        success: function(response, textStatus, xhr) {
+            if (xhr.status === 304 && cached) {
+                response = cached.data;
+            } else {
+                let etag = xhr.getResponseHeader('ETag');
+                if (etag) {
+                    etagCache[key] = {etag: etag, data: response};
+                }
+            }
+            success(response);
+        }
+    });
+}
+
 // Modular comparison table generator - reusable across tabs
 function generateComparisonTable(fieldConfig, sourceData, targetData, sourceStoreName, targetStoreName) {
                             let table = `
@@ -302,7 +329,7 @@ $('#compare-form').on('submit', function(e) {
         sku_b: $('#sku-target').val()
     };
     
-    $.post('/compare', formData, function(data) {
+    postWithETag('/compare', formData, function(data) {
         if (data.success) {
             let a = data.product_a || {};
             let b = data.product_b || {};
@@ -393,7 +420,7 @@ $('#pull-target-info').on('click', function() {
     
         $('#compare-result').html('<div class="loading"><div class="loading-spinner"></div><p class="mt-3 text-muted fw-500">Loading target store info...</p></div>');
     
-    $.post('/get_product', {
+    postWithETag('/get_product', {
         store: targetStore,
         sku: skuTarget
     }, function(data) {
@@ -447,7 +474,7 @@ $('#batch-import-form').on('submit', function(e) {
         contentType: false,
         success: function(data) {
             if (data.success) {
-                    let html = '<div class="alert alert-info">Batch import results:</div><div class="list-group">';
+                    let html = '<div class="alert alert-info">Batch import results (audit batch ' + data.batch_id + '):</div><div class="list-group">';
                 data.results.forEach(function(res) {
                     if (res.success) {
                             html += '<div class="list-group-item list-group-item-success">' + res.sku + ': Success</div>';
@@ -467,6 +494,180 @@ $('#batch-import-form').on('submit', function(e) {
     });
 });
 
+// Batch compare form
+var batchCompareState = {page: 1, formData: null};
+
+function loadBatchCompare(page) {
+    batchCompareState.page = page;
+    $('#compare-batch-result').html('<div class="loading"><div class="loading-spinner"></div><p class="mt-3 text-muted fw-500">Comparing products...</p></div>');
+    
+    var formData = $.extend({}, batchCompareState.formData, {page: page, per_page: 25});
+    postWithETag('/compare_batch', formData, function(data) {
+        if (data.success) {
+            $('#compare-batch-result').html(generateBatchCompareTable(data));
+        } else {
+            $('#compare-batch-result').html('<div class="alert alert-danger"><strong>Error:</strong> ' + (data.error || 'Batch compare failed.') + '</div>');
+        }
+    }).fail(function(xhr) {
+        $('#compare-batch-result').html('<div class="alert alert-danger">' + (xhr.responseJSON?.error || 'Batch compare failed.') + '</div>');
+    });
+}
+
+// One row per SKU pair; each differing field gets its own sync checkbox
+function generateBatchCompareTable(data) {
+    let escape = function(value) {
+        return $('<div>').text(value === null || value === undefined ? '' : value).html();
+    };
+    let table = `
+        <table class="table">
+            <thead>
+                <tr>
+                    <th style="width: 25px;" class="text-center">
+                        <input class="form-check-input" type="checkbox" id="batch-select-all">
+                    </th>
+                    <th>${escape(data.store_a_name)} SKU</th>
+                    <th>${escape(data.store_b_name)} SKU</th>
+                    <th>Differences</th>
+                </tr>
+            </thead>
+            <tbody>
+    `;
+    
+    data.results.forEach(function(row) {
+        let diffFields = Object.keys(row.diffs);
+        let status = '';
+        if (row.lookup_error_a || row.lookup_error_b) {
+            status = `<em class="text-danger">Lookup failed in ${row.lookup_error_a ? escape(data.store_a_name) : escape(data.store_b_name)}: ${escape(row.lookup_error_a || row.lookup_error_b)}</em>`;
+        } else if (!row.found_a || !row.found_b) {
+            status = `<em class="text-muted">Not found in ${!row.found_a ? escape(data.store_a_name) : escape(data.store_b_name)}</em>`;
+        } else if (diffFields.length === 0) {
+            status = '<span class="text-muted">In sync</span>';
+        } else {
+            diffFields.forEach(function(field) {
+                let diff = row.diffs[field];
+                status += `
+                    <div class="form-check">
+                        <input class="form-check-input batch-field-checkbox" type="checkbox" data-field="${field}" checked>
+                        <label class="form-check-label small">
+                            <strong>${field}</strong>: ${escape(diff.a)}${diff.a_original !== undefined ? ' (converted from ' + escape(diff.a_original) + ')' : ''} → ${escape(diff.b)}
+                        </label>
+                    </div>
+                `;
+            });
+        }
+        let selectable = row.found_a && row.found_b && diffFields.length > 0;
+        table += `
+            <tr class="batch-compare-row" data-sku-a="${escape(row.sku_a)}" data-sku-b="${escape(row.sku_b)}">
+                <td class="text-center">
+                    ${selectable ? '<input class="form-check-input batch-row-checkbox" type="checkbox">' : ''}
+                </td>
+                <td>${escape(row.sku_a)}<br><small class="text-muted">${escape(row.name_a)}</small></td>
+                <td>${escape(row.sku_b)}<br><small class="text-muted">${escape(row.name_b)}</small></td>
+                <td>${status}</td>
+            </tr>
+        `;
+    });
+    table += '</tbody></table>';
+    
+    return `
+        ${data.warning ? '<div class="alert alert-warning">' + escape(data.warning) + '</div>' : ''}
+        <div class="comparison-container">
+            <div class="sync-controls">
+                <div class="sync-controls-header">
+                    <div class="sync-controls-left">
+                        <button type="button" class="btn btn-outline" id="batch-prev-page" ${data.page <= 1 ? 'disabled' : ''}>← Prev</button>
+                        <span>Page ${data.page} of ${data.total_pages} (${data.total} pairs)</span>
+                        <button type="button" class="btn btn-outline" id="batch-next-page" ${data.page >= data.total_pages ? 'disabled' : ''}>Next →</button>
+                    </div>
+                </div>
+            </div>
+            <div class="table-scroll">
+                ${table}
+            </div>
+            <div class="sticky-button">
+                <button type="button" class="btn btn-primary btn-lg" id="batch-sync-btn">
+                    Sync Selected to Target Store
+                </button>
+            </div>
+        </div>
+    `;
+}
+
+$('#compare-batch-form').on('submit', function(e) {
+    e.preventDefault();
+    batchCompareState.formData = {
+        store_a: $('#compare-batch-source-store').val(),
+        store_b: $('#compare-batch-target-store').val(),
+        sku_pairs: $('#sku_pairs').val()
+    };
+    $('#compare-batch-message').empty();
+    loadBatchCompare(1);
+});
+
+$(document).on('click', '#batch-prev-page', function() {
+    loadBatchCompare(batchCompareState.page - 1);
+});
+
+$(document).on('click', '#batch-next-page', function() {
+    loadBatchCompare(batchCompareState.page + 1);
+});
+
+$(document).on('change', '#batch-select-all', function() {
+    $('.batch-row-checkbox').prop('checked', $(this).is(':checked'));
+});
+
+$(document).on('click', '#batch-sync-btn', function() {
+    let items = [];
+    $('.batch-compare-row').each(function() {
+        let row = $(this);
+        if (!row.find('.batch-row-checkbox').is(':checked')) {
+            return;
+        }
+        let fields = row.find('.batch-field-checkbox:checked').map(function() {
+            return $(this).data('field');
+        }).get();
+        if (fields.length > 0) {
+            items.push({sku_a: row.data('sku-a').toString(), sku_b: row.data('sku-b').toString(), fields: fields});
+        }
+    });
+    
+    if (items.length === 0) {
+        alert('Please select at least one product with fields to sync.');
+        return;
+    }
+    if (!confirm(`Sync ${items.length} product(s) to the target store?`)) {
+        return;
+    }
+    
+    $('#compare-batch-result').html('<div class="loading"><div class="loading-spinner"></div><p class="mt-3 text-muted fw-500">Updating target store...</p></div>');
+    $.ajax({
+        url: '/update_target_batch',
+        type: 'POST',
+        contentType: 'application/json',
+        data: JSON.stringify({
+            store_a: batchCompareState.formData.store_a,
+            store_b: batchCompareState.formData.store_b,
+            items: items
+        }),
+        success: function(data) {
+            if (data.success) {
+                let failed = data.results.filter(res => !res.success).map(res => res.sku + (res.error ? ' (' + res.error + ')' : ''));
+                let message = failed.length === 0
+                    ? '<div class="alert alert-success">Updated ' + data.results.length + ' product(s) (audit batch ' + data.batch_id + ').</div>'
+                    : '<div class="alert alert-danger">Failed to update: ' + $('<div>').text(failed.join(', ')).html() + ' (audit batch ' + data.batch_id + ')</div>';
+                // Reload the page so the table shows the new target values
+                $('#compare-batch-message').html(message);
+                loadBatchCompare(batchCompareState.page);
+            } else {
+                $('#compare-batch-result').html('<div class="alert alert-danger">' + (data.error || 'Failed to update target store.') + '</div>');
+            }
+        },
+        error: function(xhr) {
+            $('#compare-batch-result').html('<div class="alert alert-danger">' + (xhr.responseJSON?.error || 'Failed to update target store.') + '</div>');
+        }
+    });
+});
+
     // Sync checkbox functionality
     $(document).on('change', '.sync-checkbox', function() {
         handleSyncToggle($(this));
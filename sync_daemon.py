@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+BigCommerce Background Sync Service
+
+Watches configured store pairs on a schedule and queues every SKU modified in
+the source store since the previous scan. All imports go through one
+prioritized work queue kept in a local SQLite file: this daemon owns the queue
+and runs every job, while the Flask app (SYNC_SERVICE_ENABLED) and the webhook
+receiver only add jobs to it and wait for their results. Interactive requests
+(operator clicks) are therefore always taken ahead of the bulk work produced by
+the scans, and while one runs, bulk jobs hold back their API requests so the
+store quota goes to the operator first.
+
+Run exactly one daemon per queue file. It publishes its status to the queue
+file, where the app's /sync/status reads it back.
+
+Configuration (environment / .env):
+    SYNC_STORE_PAIRS   source:target pairs, e.g. "wilson_us:signal_us,wilson_us:wilson_ca"
+    SYNC_INTERVAL      seconds between catalog scans (default 300)
+    SYNC_WORKERS       number of import worker threads (default 1), plus one reserved for interactive jobs
+    SYNC_RATE          API requests per second per store for the daemon's imports (default 3)
+    SYNC_QUEUE_PATH    SQLite queue file shared with the app (default: import_tool_sync_queue.sqlite3 in the temp dir)
+
+Usage:
+    python sync_daemon.py
+"""
+
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Any
+from dotenv import load_dotenv
+from bigcommerce_import_tool import ProductImporter
+from audit_log import new_batch_id
+from rate_budget import StoreRateBudget
+
+# Lower numbers are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+DEFAULT_SYNC_INTERVAL = 300
+DEFAULT_SYNC_RATE = 3.0
+DEFAULT_QUEUE_PATH = os.path.join(tempfile.gettempdir(), "import_tool_sync_queue.sqlite3")
+
+# How often the daemon publishes its status, and when the app considers it gone
+STATUS_INTERVAL = 5
+STATUS_STALE_AFTER = 3 * STATUS_INTERVAL
+
+# Finished jobs are kept this long so waiters can read their results
+FINISHED_JOB_TTL = 24 * 3600
+
+# Seconds between queue polls by idle workers and waiters
+POLL_INTERVAL = 0.25
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS sync_jobs ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " source_store TEXT NOT NULL, target_store TEXT NOT NULL, sku TEXT NOT NULL,"
+    " update_if_exists INTEGER NOT NULL, priority INTEGER NOT NULL, batch_id TEXT NOT NULL,"
+    " state TEXT NOT NULL, superseded_by INTEGER, result INTEGER, error TEXT,"
+    " enqueued_at REAL NOT NULL, finished_at REAL)",
+    "CREATE INDEX IF NOT EXISTS sync_jobs_state ON sync_jobs (state, priority, id)",
+    "CREATE TABLE IF NOT EXISTS sync_status ("
+    " id INTEGER PRIMARY KEY CHECK (id = 1), updated_at REAL NOT NULL, body TEXT NOT NULL)"
+]
+
+
+def parse_store_pairs(value: str) -> List[Tuple[str, str]]:
+    """Parse "source:target,source:target" into a list of store name pairs"""
+    pairs = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        source, _, target = item.partition(":")
+        if not source or not target:
+            raise ValueError(f"Invalid store pair '{item}', expected source:target")
+        pairs.append((source.strip(), target.strip()))
+    return pairs
+
+
+class SyncQueue:
+    """SQLite-backed priority queue of SKU imports, shared by the daemon and the app.
+
+    Job states: pending -> running -> done, or pending -> superseded when a later
+    job for the same SKU covers it (superseded_by points at the replacement).
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    @classmethod
+    def from_env(cls) -> "SyncQueue":
+        return cls(path=os.getenv("SYNC_QUEUE_PATH", DEFAULT_QUEUE_PATH))
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, so writers can take the lock up front with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, source_store: str, target_store: str, sku: str,
+               update_if_exists: bool = True, priority: int = PRIORITY_BULK,
+               batch_id: Optional[str] = None) -> int:
+        """Queue a SKU for import and return the job ID to wait on.
+
+        A pending job that already covers the request (same or wider update flag,
+        same or higher priority) is returned instead of queuing a copy. A pending
+        job the new one covers is superseded: the new job gets the more urgent of
+        the two priorities (but a new place in line behind jobs already queued at
+        that priority), and anyone waiting on the old job gets its result.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            pending = conn.execute(
+                "SELECT id, update_if_exists, priority FROM sync_jobs"
+                " WHERE state = 'pending' AND source_store = ? AND target_store = ? AND sku = ?",
+                (source_store, target_store, sku)).fetchall()
+            for row in pending:
+                if (row["update_if_exists"] or not update_if_exists) and row["priority"] <= priority:
+                    conn.execute("COMMIT")
+                    return row["id"]
+            superseded = [row for row in pending if update_if_exists or not row["update_if_exists"]]
+            priority = min([priority] + [row["priority"] for row in superseded])
+            job_id = conn.execute(
+                "INSERT INTO sync_jobs (source_store, target_store, sku, update_if_exists, priority,"
+                " batch_id, state, enqueued_at) VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
+                (source_store, target_store, sku, int(update_if_exists), priority,
+                 batch_id or new_batch_id(), time.time())).lastrowid
+            conn.executemany(
+                "UPDATE sync_jobs SET state = 'superseded', superseded_by = ?, finished_at = ? WHERE id = ?",
+                [(job_id, time.time(), row["id"]) for row in superseded])
+            conn.execute("COMMIT")
+            return job_id
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, max_priority: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Mark the most urgent pending job as running and return it, or None if there is none"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            sql = "SELECT * FROM sync_jobs WHERE state = 'pending'"
+            params = ()
+            if max_priority is not None:
+                sql += " AND priority <= ?"
+                params = (max_priority,)
+            row = conn.execute(sql + " ORDER BY priority, id LIMIT 1", params).fetchone()
+            if row:
+                conn.execute("UPDATE sync_jobs SET state = 'running' WHERE id = ?", (row["id"],))
+            conn.execute("COMMIT")
+            return dict(row) if row else None
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def finish(self, job_id: int, result: bool, error: Optional[str] = None):
+        with self._connect() as conn:
+            conn.execute("UPDATE sync_jobs SET state = 'done', result = ?, error = ?, finished_at = ? WHERE id = ?",
+                         (int(bool(result)), error, time.time(), job_id))
+
+    def requeue_running(self) -> int:
+        """Put jobs left running by a stopped daemon back in the queue"""
+        with self._connect() as conn:
+            return conn.execute("UPDATE sync_jobs SET state = 'pending' WHERE state = 'running'").rowcount
+
+    def purge_finished(self, older_than: float = FINISHED_JOB_TTL):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sync_jobs WHERE state IN ('done', 'superseded') AND finished_at < ?",
+                         (time.time() - older_than,))
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM sync_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the job, or the job that superseded it, is done; returns it (None on timeout)"""
+        deadline = time.time() + timeout if timeout is not None else None
+        while deadline is None or time.time() < deadline:
+            job = self.get(job_id)
+            if job is None:
+                return None
+            if job["state"] == "superseded":
+                job_id = job["superseded_by"]
+                continue
+            if job["state"] == "done":
+                return job
+            time.sleep(POLL_INTERVAL)
+        return None
+
+    def import_now(self, source_store: str, target_store: str, sku: str,
+                   update_if_exists: bool = False, timeout: Optional[float] = 120,
+                   batch_id: Optional[str] = None) -> bool:
+        """Queue an operator-triggered import ahead of any bulk work and wait for it.
+
+        Returns False on failure or timeout; an error raised by the import is re-raised
+        as RuntimeError so the caller can show it.
+        """
+        job_id = self.submit(source_store, target_store, sku, update_if_exists, PRIORITY_INTERACTIVE, batch_id)
+        job = self.wait(job_id, timeout)
+        if job is None:
+            return False
+        if job["error"]:
+            raise RuntimeError(job["error"])
+        return bool(job["result"])
+
+    def publish_status(self, status: Dict[str, Any]):
+        """Store the daemon's own counters for readers in other processes"""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO sync_status (id, updated_at, body) VALUES (1, ?, ?)",
+                         (time.time(), json.dumps(status)))
+
+    def daemon_running(self) -> bool:
+        """Whether a daemon published its status recently"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT updated_at FROM sync_status WHERE id = 1").fetchone()
+        return bool(row) and time.time() - row["updated_at"] < STATUS_STALE_AFTER
+
+    def status(self) -> Dict[str, Any]:
+        """Queue depth and lag from the queue itself, plus the daemon's last published counters"""
+        now = time.time()
+        with self._connect() as conn:
+            pending = conn.execute(
+                "SELECT SUM(CASE WHEN priority <= ? THEN 1 ELSE 0 END) AS interactive,"
+                " COUNT(*) AS total, MIN(enqueued_at) AS oldest FROM sync_jobs WHERE state = 'pending'",
+                (PRIORITY_INTERACTIVE,)).fetchone()
+            running = conn.execute("SELECT COUNT(*) FROM sync_jobs WHERE state = 'running'").fetchone()[0]
+            daemon = conn.execute("SELECT updated_at, body FROM sync_status WHERE id = 1").fetchone()
+        interactive = pending["interactive"] or 0
+        return {
+            "queue_depth": pending["total"],
+            "interactive_depth": interactive,
+            "bulk_depth": pending["total"] - interactive,
+            "running": running,
+            "lag_seconds": round(now - pending["oldest"], 1) if pending["oldest"] else 0.0,
+            "daemon_running": bool(daemon) and now - daemon["updated_at"] < STATUS_STALE_AFTER,
+            "daemon_updated": datetime.fromtimestamp(daemon["updated_at"], tz=timezone.utc).isoformat() if daemon else None,
+            **(json.loads(daemon["body"]) if daemon else {})
+        }
+
+
+class SyncRateLimiter:
+    """Rate limiter for the daemon's store APIs: bulk jobs wait while an interactive job runs"""
+
+    def __init__(self, service: "SyncService", limiter=None):
+        self.service = service
+        self.limiter = limiter
+
+    def wait(self):
+        self.service.yield_to_interactive()
+        if self.limiter is not None:
+            self.limiter.wait()
+
+
+class SyncService:
+    """Scheduled catalog scanner plus the workers that drain the sync queue"""
+
+    def __init__(self, importer: ProductImporter, store_pairs: List[Tuple[str, str]], queue: SyncQueue,
+                 interval: float = DEFAULT_SYNC_INTERVAL, workers: int = 1,
+                 requests_per_second: Optional[float] = DEFAULT_SYNC_RATE):
+        for source, target in store_pairs:
+            if not importer.get_store_by_name(source) or not importer.get_store_by_name(target):
+                raise ValueError(f"Unknown store in pair {source}:{target}")
+        self.importer = importer
+        self.store_pairs = store_pairs
+        self.queue = queue
+        self.interval = interval
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        # Priority of the job each worker thread is running, and how many interactive jobs run now
+        self._local = threading.local()
+        self._interactive_running = 0
+        self._interactive_done = threading.Condition(self._lock)
+        budget = StoreRateBudget(importer.stores.keys(), requests_per_second) if requests_per_second else None
+        for store_name, store in importer.stores.items():
+            store.rate_limiter = SyncRateLimiter(self, budget.limiter_for(store_name) if budget else None)
+        # Start watching from one interval ago rather than syncing whole catalogs
+        start = time.time() - interval
+        self.watermarks = {pair: start for pair in store_pairs}
+        self.last_scan = {}
+        self.stats = {"processed": 0, "succeeded": 0, "failed": 0, "last_error": None}
+
+    @classmethod
+    def from_env(cls, importer: ProductImporter) -> "SyncService":
+        """Build a service from SYNC_STORE_PAIRS / SYNC_INTERVAL / SYNC_WORKERS / SYNC_RATE / SYNC_QUEUE_PATH"""
+        load_dotenv()
+        return cls(
+            importer,
+            parse_store_pairs(os.getenv("SYNC_STORE_PAIRS", "")),
+            SyncQueue.from_env(),
+            interval=float(os.getenv("SYNC_INTERVAL", DEFAULT_SYNC_INTERVAL)),
+            workers=int(os.getenv("SYNC_WORKERS", 1)),
+            requests_per_second=float(os.getenv("SYNC_RATE", DEFAULT_SYNC_RATE))
+        )
+
+    def yield_to_interactive(self):
+        """Called before each API request: hold bulk work back while an interactive job runs"""
+        priority = getattr(self._local, "priority", None)
+        if priority is None or priority <= PRIORITY_INTERACTIVE:
+            return
+        with self._interactive_done:
+            while self._interactive_running and not self._stop.is_set():
+                self._interactive_done.wait(1)
+
+    def scan_pair(self, source_store: str, target_store: str) -> int:
+        """Queue every SKU modified in the source store since the last scan of this pair.
+
+        The watermark only advances after a complete listing; a failed page raises
+        and the next scan starts again from the same point. Each scan's imports
+        share one audit batch ID.
+        """
+        pair = (source_store, target_store)
+        scan_started = time.time()
+        since = datetime.fromtimestamp(self.watermarks[pair], tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+        store = self.importer.get_store_by_name(source_store)
+        batch_id = new_batch_id()
+        queued = 0
+        for product in store.iter_products(include_fields="sku", **{"date_modified:min": since}):
+            if product.get("sku"):
+                self.queue.submit(source_store, target_store, product["sku"], batch_id=batch_id)
+                queued += 1
+        self.watermarks[pair] = scan_started
+        self.last_scan[pair] = scan_started
+        print(f"Sync scan {source_store} -> {target_store}: queued {queued} changed SKU(s) (batch {batch_id})")
+        return queued
+
+    def _scheduler_loop(self):
+        while not self._stop.is_set():
+            for source_store, target_store in self.store_pairs:
+                try:
+                    self.scan_pair(source_store, target_store)
+                except Exception as e:
+                    print(f"Error scanning {source_store} -> {target_store}: {e}")
+                    self.stats["last_error"] = str(e)
+            self.queue.purge_finished()
+            self._stop.wait(self.interval)
+
+    def _worker_loop(self, max_priority: Optional[int] = None):
+        while not self._stop.is_set():
+            job = self.queue.claim(max_priority)
+            if job is None:
+                self._stop.wait(POLL_INTERVAL)
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict[str, Any]):
+        interactive = job["priority"] <= PRIORITY_INTERACTIVE
+        self._local.priority = job["priority"]
+        if interactive:
+            with self._lock:
+                self._interactive_running += 1
+        result, error = False, None
+        try:
+            result = self.importer.import_product_between_stores(
+                job["source_store"], job["target_store"], job["sku"],
+                update_if_exists=bool(job["update_if_exists"]), batch_id=job["batch_id"])
+        except Exception as e:
+            print(f"Error syncing {job['sku']} to {job['target_store']}: {e}")
+            error = str(e)
+            self.stats["last_error"] = error
+        finally:
+            self._local.priority = None
+            if interactive:
+                with self._interactive_done:
+                    self._interactive_running -= 1
+                    self._interactive_done.notify_all()
+        self.queue.finish(job["id"], result, error)
+        with self._lock:
+            self.stats["processed"] += 1
+            self.stats["succeeded" if result else "failed"] += 1
+
+    def _status_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.queue.publish_status(self.published_status())
+            except sqlite3.Error as e:
+                print(f"Error publishing sync status: {e}")
+            self._stop.wait(STATUS_INTERVAL)
+
+    def start(self, schedule: bool = True):
+        """Start the workers (one reserved for interactive jobs), the status publisher and, unless
+        schedule is False, the catalog scanner"""
+        self._stop.clear()
+        requeued = self.queue.requeue_running()
+        if requeued:
+            print(f"Requeued {requeued} job(s) left running by a previous daemon")
+        targets = [(self._worker_loop, ())] * self.workers
+        targets.append((self._worker_loop, (PRIORITY_INTERACTIVE,)))
+        targets.append((self._status_loop, ()))
+        if schedule and self.store_pairs:
+            targets.append((self._scheduler_loop, ()))
+        for target, args in targets:
+            thread = threading.Thread(target=target, args=args, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Signal all threads to stop and wait for them"""
+        self._stop.set()
+        with self._interactive_done:
+            self._interactive_done.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def published_status(self) -> Dict[str, Any]:
+        """The daemon-side counters that the queue's status() cannot see"""
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            "last_scan": {
+                f"{source}:{target}": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+                for (source, target), ts in self.last_scan.items()
+            },
+            **stats
+        }
+
+
+def main():
+    """Run the sync service in the foreground until interrupted"""
+    service = SyncService.from_env(ProductImporter())
+    if not service.store_pairs:
+        print("No store pairs configured. Set SYNC_STORE_PAIRS, e.g. wilson_us:signal_us")
+        return 1
+
+    pairs = ", ".join(f"{source} -> {target}" for source, target in service.store_pairs)
+    print(f"🚀 Starting sync service for {pairs} (every {service.interval:g}s, queue {service.queue.path})")
+    service.start()
+    try:
+        while True:
+            time.sleep(60)
+            status = service.queue.status()
+            print(f"Sync status: depth={status['queue_depth']} lag={status['lag_seconds']}s "
+                  f"processed={status.get('processed', 0)} failed={status.get('failed', 0)}")
+    except KeyboardInterrupt:
+        print("\nStopping sync service...")
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
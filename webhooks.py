@@ -0,0 +1,128 @@
+"""
+BigCommerce webhook propagation
+
+Receives store/product/updated events and pushes the changed product to the
+configured target stores. BigCommerce often sends several events for one save
+(product, then variants, then custom fields), so events are coalesced per
+product over a short window and each product is imported only once per burst.
+
+Configuration (environment / .env):
+    WEBHOOK_SECRET       shared secret BigCommerce sends in the X-Webhook-Secret header
+    WEBHOOK_STORE_PAIRS  source:target pairs to propagate (defaults to SYNC_STORE_PAIRS)
+    WEBHOOK_WINDOW       coalescing window in seconds (default 5)
+
+Avoid configuring a pair in both directions; each write would echo back as a
+new event from the target store.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+from bigcommerce_import_tool import ProductImporter
+from sync_daemon import parse_store_pairs
+from audit_log import new_batch_id
+
+PRODUCT_UPDATED_SCOPE = "store/product/updated"
+
+DEFAULT_WEBHOOK_WINDOW = 5
+
+# Between interactive imports and scheduled bulk work when routed through the sync queue
+PRIORITY_WEBHOOK = 5
+
+
+class WebhookPropagator:
+    """Coalesces product update events and imports each changed product to its targets"""
+
+    def __init__(self, importer: ProductImporter, store_pairs: List[Tuple[str, str]],
+                 window: float = DEFAULT_WEBHOOK_WINDOW, sync_queue=None):
+        self.importer = importer
+        self.window = window
+        self.sync_queue = sync_queue
+        self.targets = {}
+        for source, target in store_pairs:
+            self.targets.setdefault(source, []).append(target)
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, importer: ProductImporter, sync_queue=None) -> "WebhookPropagator":
+        """Build a propagator from WEBHOOK_STORE_PAIRS / WEBHOOK_WINDOW"""
+        pairs = os.getenv("WEBHOOK_STORE_PAIRS") or os.getenv("SYNC_STORE_PAIRS", "")
+        return cls(
+            importer,
+            parse_store_pairs(pairs),
+            window=float(os.getenv("WEBHOOK_WINDOW", DEFAULT_WEBHOOK_WINDOW)),
+            sync_queue=sync_queue
+        )
+
+    def get_store_name_by_hash(self, store_hash: str) -> Optional[str]:
+        """Map a BigCommerce store hash to the configured store name"""
+        for name, store in self.importer.stores.items():
+            if store.store_hash == store_hash:
+                return name
+        return None
+
+    def handle_event(self, payload: Dict[str, Any]) -> bool:
+        """Record a webhook event; returns True if it was queued for propagation"""
+        if payload.get("scope") != PRODUCT_UPDATED_SCOPE:
+            return False
+        producer = payload.get("producer", "")
+        store_name = self.get_store_name_by_hash(producer.split("/", 1)[-1])
+        product_id = (payload.get("data") or {}).get("id")
+        if not store_name or not product_id or store_name not in self.targets:
+            return False
+
+        with self._condition:
+            # The first event of a burst fixes the flush time; later ones just merge into it
+            self._pending.setdefault((store_name, product_id), time.time() + self.window)
+            self._ensure_thread()
+            self._condition.notify()
+        return True
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                now = time.time()
+                due = [key for key, deadline in self._pending.items() if deadline <= now]
+                if not due:
+                    self._condition.wait(min(self._pending.values()) - now)
+                    continue
+                for key in due:
+                    del self._pending[key]
+            for store_name, product_id in due:
+                try:
+                    self.propagate(store_name, product_id)
+                except Exception as e:
+                    print(f"Error propagating product {product_id} from {store_name}: {e}")
+
+    def propagate(self, store_name: str, product_id: int):
+        """Import one changed product from store_name into each of its target stores, as one audit batch"""
+        store = self.importer.get_store_by_name(store_name)
+        product = store.get_product_by_id(product_id, include_fields="sku")
+        if not product or not product.get("sku"):
+            print(f"Webhook: product {product_id} in {store_name} has no SKU, skipping")
+            return
+        sku = product["sku"]
+        batch_id = new_batch_id()
+        for target_store in self.targets.get(store_name, []):
+            if self.sync_queue:
+                self.sync_queue.submit(store_name, target_store, sku, update_if_exists=True,
+                                         priority=PRIORITY_WEBHOOK, batch_id=batch_id)
+            else:
+                try:
+                    success = self.importer.import_product_between_stores(
+                        store_name, target_store, sku, update_if_exists=True, batch_id=batch_id)
+                except ValueError as e:
+                    # A misconfigured pair (e.g. no FX rate) must not hold up the other targets
+                    print(f"Webhook: {sku} {store_name} -> {target_store}: {e}")
+                    continue
+                print(f"Webhook: {sku} {store_name} -> {target_store}: {'ok' if success else 'failed'} (batch {batch_id})")